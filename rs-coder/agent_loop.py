@@ -15,7 +15,7 @@ Usage:
                           --output generated.rfx
 """
 
-import argparse
+import functools
 import json
 import os
 import platform
@@ -26,13 +26,24 @@ from pathlib import Path
 
 import requests
 
+# orjson decodes the per-token SSE chunks noticeably faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ============================================================================
 # Compiler Detection
 # ============================================================================
 
+@functools.lru_cache(maxsize=None)
 def detect_reflexc_path():
-    """Auto-detect reflexc path based on platform architecture."""
+    """Auto-detect reflexc path based on platform architecture.
+
+    Cached so batch drivers that call agent_loop() repeatedly don't re-probe
+    the filesystem on every invocation.
+    """
     arch = platform.machine().lower()
 
     if arch in ('aarch64', 'arm64'):
@@ -66,8 +77,13 @@ def check_vllm_health(host, port):
         return False
 
 
+@functools.lru_cache(maxsize=None)
 def get_model_name(host, port):
-    """Get the model name from vLLM server."""
+    """Get the model name from vLLM server.
+
+    Cached per (host, port) - the served model doesn't change while the
+    agent loop is running.
+    """
     try:
         response = requests.get(f"http://{host}:{port}/v1/models", timeout=10)
         if response.status_code == 200:
@@ -81,8 +97,15 @@ def get_model_name(host, port):
     return "deepseek-coder-v2-lite-instruct-fp8"
 
 
+_DATA_PREFIX = b'data: '
+
+
 def call_vllm(messages, host, port, model, temperature, max_tokens=4096):
-    """Call vLLM API and return the response text."""
+    """Call vLLM API and return the response text.
+
+    ``messages`` is only serialized, never mutated - callers may pass their
+    conversation history without copying.
+    """
     base_url = f"http://{host}:{port}"
 
     payload = {
@@ -106,27 +129,30 @@ def call_vllm(messages, host, port, model, temperature, max_tokens=4096):
             print(response.text)
             return None
 
-        # Stream and accumulate response
-        full_response = ""
-        for line in response.iter_lines():
-            if line:
-                line = line.decode('utf-8')
-                if line.startswith('data: '):
-                    data = line[6:]
-                    if data == '[DONE]':
-                        break
-                    try:
-                        chunk = json.loads(data)
-                        delta = chunk['choices'][0]['delta']
-                        if 'content' in delta:
-                            content = delta['content']
-                            print(content, end="", flush=True)
-                            full_response += content
-                    except json.JSONDecodeError:
-                        continue
+        # Stream and accumulate response. Lines stay as bytes until after
+        # the prefix check (no decode for keepalives/non-data lines), JSON
+        # decodes via orjson when available, and chunks collect into a list
+        # joined once at the end instead of quadratic string concatenation.
+        loads = orjson.loads if orjson is not None else json.loads
+        parts = []
+        for raw in response.iter_lines():
+            if not raw or not raw.startswith(_DATA_PREFIX):
+                continue
+            data = raw[6:]
+            if data == b'[DONE]':
+                break
+            try:
+                chunk = loads(data)
+            except ValueError:
+                continue
+            content = chunk['choices'][0]['delta'].get('content')
+            if content:
+                sys.stdout.write(content)
+                sys.stdout.flush()
+                parts.append(content)
 
         print()  # Newline after streaming
-        return full_response
+        return ''.join(parts)
 
     except requests.exceptions.Timeout:
         print("Error: vLLM request timed out")
@@ -140,6 +166,13 @@ def call_vllm(messages, host, port, model, temperature, max_tokens=4096):
 # Code Extraction
 # ============================================================================
 
+# Compiled once at import - extraction runs on every LLM iteration and the
+# responses can be large, so don't recompile (or char-walk) per call
+REFLEXSCRIPT_BLOCK_RE = re.compile(r'```reflexscript\s*\n(.*?)```', re.DOTALL)
+GENERIC_BLOCK_RE = re.compile(r'```\s*\n(.*?)```', re.DOTALL)
+BRACE_RE = re.compile(r'[{}]')
+
+
 def extract_code_from_response(response):
     """Extract ReflexScript code from LLM response.
 
@@ -152,14 +185,12 @@ def extract_code_from_response(response):
         return None
 
     # Try to find ```reflexscript block
-    pattern = r'```reflexscript\s*\n(.*?)```'
-    match = re.search(pattern, response, re.DOTALL)
+    match = REFLEXSCRIPT_BLOCK_RE.search(response)
     if match:
         return match.group(1).strip()
 
     # Try generic code block
-    pattern = r'```\s*\n(.*?)```'
-    match = re.search(pattern, response, re.DOTALL)
+    match = GENERIC_BLOCK_RE.search(response)
     if match:
         code = match.group(1).strip()
         # Verify it looks like ReflexScript
@@ -169,19 +200,20 @@ def extract_code_from_response(response):
     # Look for reflex keyword directly
     if 'reflex ' in response:
         start = response.find('reflex ')
-        # Find the matching closing brace
+        # Find the matching closing brace - jump brace to brace with the
+        # compiled scanner instead of walking every character in Python
         brace_count = 0
         in_code = False
         end = start
 
-        for i, char in enumerate(response[start:], start):
-            if char == '{':
+        for m in BRACE_RE.finditer(response, start):
+            if response[m.start()] == '{':
                 brace_count += 1
                 in_code = True
-            elif char == '}':
+            else:
                 brace_count -= 1
                 if in_code and brace_count == 0:
-                    end = i + 1
+                    end = m.end()
                     break
 
         if end > start:
@@ -233,6 +265,16 @@ def run_reflexc(rfx_path, reflexc_path):
 # Error Parsing
 # ============================================================================
 
+# Pattern for error line: FILE:LINE:COLUMN: TYPE: MESSAGE
+# Compiled once at module scope, and the file-path group forbids ':' so the
+# engine fails fast on non-error lines instead of backtracking a leading '.+'
+# across the whole line
+_ERROR_LINE_RE = re.compile(r'^([^:\n]+):(\d+):(\d+):\s*(\w[\w ]*):\s*(.+)$')
+
+_SUGGESTION_PREFIX = "Suggestion:"
+_SUGGESTION_PREFIX_LEN = len(_SUGGESTION_PREFIX)
+
+
 def parse_errors(compiler_output):
     """Parse reflexc compiler output into structured errors.
 
@@ -240,17 +282,25 @@ def parse_errors(compiler_output):
     May include 'Suggestion:' lines.
     """
     errors = []
-    lines = compiler_output.strip().split('\n')
+    # splitlines() copes with leading/trailing newlines without the
+    # intermediate stripped copy of the whole output
+    lines = compiler_output.splitlines()
     current_error = None
+    msg_parts = []
 
-    # Pattern for error line: FILE:LINE:COLUMN: TYPE: MESSAGE
-    error_pattern = re.compile(r'^(.+):(\d+):(\d+):\s*(\w+(?:\s+\w+)*):\s*(.+)$')
+    def finalize(error):
+        # Join continuation fragments once instead of concatenating
+        # per line (quadratic on long wrapped diagnostics)
+        if len(msg_parts) > 1:
+            error["message"] = " ".join(msg_parts)
+        errors.append(error)
 
     for line in lines:
-        match = error_pattern.match(line)
+        match = _ERROR_LINE_RE.match(line)
         if match:
             if current_error:
-                errors.append(current_error)
+                finalize(current_error)
+            msg_parts = [match.group(5)]
             current_error = {
                 "file": match.group(1),
                 "line": int(match.group(2)),
@@ -259,79 +309,136 @@ def parse_errors(compiler_output):
                 "message": match.group(5),
                 "suggestion": None
             }
-        elif line.strip().startswith("Suggestion:") and current_error:
-            current_error["suggestion"] = line.split("Suggestion:", 1)[1].strip()
-        elif line.strip() and current_error and not line.startswith(' '):
+            continue
+
+        # Strip once per non-error line and reuse for all branches
+        stripped = line.strip()
+        if stripped.startswith(_SUGGESTION_PREFIX) and current_error:
+            # Slice off the known prefix instead of re-scanning with split
+            current_error["suggestion"] = stripped[_SUGGESTION_PREFIX_LEN:].lstrip()
+        elif stripped and current_error and not line.startswith(' '):
             # Continuation of error message
-            current_error["message"] += " " + line.strip()
+            msg_parts.append(stripped)
 
     if current_error:
-        errors.append(current_error)
+        finalize(current_error)
 
     return errors
 
 
+# Per-category literal patterns compiled into single alternations. One
+# regex scan per category replaces ~30 Python-level substring tests per
+# line; categories are checked in priority order, same as the original
+# cascade of any(...) loops.
+def _category_re(patterns):
+    # IGNORECASE lets the compiled pattern casefold during the scan, so the
+    # classification loop never has to allocate a lowercased copy per line
+    return re.compile('|'.join(map(re.escape, patterns)), re.IGNORECASE)
+
+
+_SKIP_RE = _category_re([
+    "safety analysis results", "safety properties: verified",
+    "estimated wcet", "estimated stack", "estimated state",
+    "max loop depth", "max stack depth", "execution rate",
+    "platform:", "toolchain:", "compilation complete", "build successful",
+    "phase:", "checking:", "processing:"
+])
+_SYNTAX_RE = _category_re([
+    "error:", "syntax error", "parse error", "expected", "missing",
+    "unexpected token", "invalid syntax", "malformed"
+])
+_TYPE_RE = _category_re([
+    "type error", "undefined", "undeclared", "incompatible types",
+    "type mismatch", "cannot convert", "semantic error", "analysis error"
+])
+_LINKER_RE = _category_re([
+    "undefined reference", "ld:", "cannot find -l", "unresolved symbol",
+    "linker error", "link error"
+])
+_WARN_RE = _category_re([
+    "warning:", "deprecated", "unused"
+])
+
+# Cheap prefilter: every line the category regexes could route away from
+# other_messages contains one of these stems. Most compiler output is
+# informational, so the common case is a single scan and no category
+# regex work at all.
+_HOT_TOKENS = ('error', 'warn', 'undef', 'undecl', 'expect', 'missing',
+               'incompatib', 'mismatch', 'cannot convert', 'malformed',
+               'invalid', 'ld:', 'cannot find -l', 'unresolved', 'deprec',
+               'unused')
+_HOT_RE = _category_re(_HOT_TOKENS)
+
+# Checked in priority order - a line lands in the first matching bucket,
+# mirroring the original elif cascade
+_CATEGORY_RES = (
+    ("syntax", _SYNTAX_RE),
+    ("type", _TYPE_RE),
+    ("linker", _LINKER_RE),
+    ("warn", _WARN_RE),
+)
+
+
 def parse_and_categorize_errors(raw_output):
     """Parse compiler output and categorize errors exactly like Reflex-langchain.
 
     This mirrors the _parse_compiler_output method from enhanced_tools.py.
+
+    Returns:
+        dict with keys "syntax", "type", "linker", "warn", "other",
+        each mapping to the list of matching lines.
     """
-    lines = raw_output.split("\n")
-    syntax_errors = []
-    type_errors = []
-    linker_errors = []
-    warnings = []
-    other_messages = []
+    buckets = {"syntax": [], "type": [], "linker": [], "warn": [], "other": []}
 
-    for line in lines:
+    for line in raw_output.splitlines():
         if not line.strip():
             continue
 
-        line_lower = line.lower()
-
-        # Skip informational/success messages
-        if any(pattern in line_lower for pattern in [
-            "safety analysis results", "safety properties: verified",
-            "estimated wcet", "estimated stack", "estimated state",
-            "max loop depth", "max stack depth", "execution rate",
-            "platform:", "toolchain:", "compilation complete", "build successful",
-            "phase:", "checking:", "processing:"
-        ]):
-            other_messages.append(line)
+        # Fast path: lines without any hot token can only end up in "other",
+        # and informational/success lines are routed there too
+        if not _HOT_RE.search(line) or _SKIP_RE.search(line):
+            buckets["other"].append(line)
             continue
 
-        # Syntax and parse errors
-        if any(pattern in line_lower for pattern in [
-            "error:", "syntax error", "parse error", "expected", "missing",
-            "unexpected token", "invalid syntax", "malformed"
-        ]):
-            syntax_errors.append(line)
-        # Type and semantic errors
-        elif any(pattern in line_lower for pattern in [
-            "type error", "undefined", "undeclared", "incompatible types",
-            "type mismatch", "cannot convert", "semantic error", "analysis error"
-        ]):
-            type_errors.append(line)
-        # Linker errors
-        elif any(pattern in line_lower for pattern in [
-            "undefined reference", "ld:", "cannot find -l", "unresolved symbol",
-            "linker error", "link error"
-        ]):
-            linker_errors.append(line)
-        # Warnings
-        elif any(pattern in line_lower for pattern in [
-            "warning:", "deprecated", "unused"
-        ]):
-            warnings.append(line)
-        # Other
-        elif any(pattern in line_lower for pattern in [
-            "failed", "error", "exception", "abort", "fatal"
-        ]) and "cannot open file" not in line_lower:
-            other_messages.append(line)
+        for name, pattern in _CATEGORY_RES:
+            if pattern.search(line):
+                buckets[name].append(line)
+                break
         else:
-            other_messages.append(line)
+            buckets["other"].append(line)
 
-    return syntax_errors, type_errors, linker_errors, warnings, other_messages
+    return buckets
+
+
+# Constant prompt blocks, built once at import. The feedback formatters run
+# on every retry, so the static text should not be re-assembled per call.
+_SIMPLE_UNITS_FOOTER = (
+    "\nVALID UNITS: [m] [rad] [s] [ms] [Hz] [mps] [radps] [deg] [degC] [mm] [cm] [kg]\n"
+    "INVALID: [Nm] [rad/s] [m/s] - NO slash in units\n"
+)
+
+_SYNTAX_FIX_TIPS = """  🔴 For syntax errors:
+    - Fix missing/extra braces, parentheses, semicolons
+    - Check for typos in keywords and operators
+    - Ensure proper ReflexScript syntax structure"""
+
+_TYPE_FIX_TIPS = """  🟠 For type/declaration errors:
+    - Verify all variables are declared with correct types
+    - Check unit annotations (e.g., i16[m], u8[Hz])
+    - Ensure type compatibility in expressions"""
+
+_BATCH_STRATEGY_BLOCK = """
+  📝 BATCH FIXING STRATEGY:
+    1. Address ALL errors of the same type together
+    2. Start with syntax errors first (they often cascade)
+    3. Then fix type/declaration errors
+    4. Finally address linker issues
+    5. Re-compile to check if fixes resolved multiple errors"""
+
+
+def _fmt_top(items, n=10):
+    """Format the first n items as numbered '  i. item' lines."""
+    return [f"  {i}. {x}" for i, x in enumerate(items[:n], 1)]
 
 
 def format_error_feedback_for_history(code, errors, raw_output, simple_mode=False):
@@ -365,8 +472,7 @@ def format_error_feedback_for_history(code, errors, raw_output, simple_mode=Fals
         if len(errors) > 5:
             output.append(f"  ... {len(errors) - 5} more errors")
 
-        output.append("\nVALID UNITS: [m] [rad] [s] [ms] [Hz] [mps] [radps] [deg] [degC] [mm] [cm] [kg]")
-        output.append("INVALID: [Nm] [rad/s] [m/s] - NO slash in units\n")
+        output.append(_SIMPLE_UNITS_FOOTER)
 
         output.append("YOUR CODE:")
         output.append("```reflexscript")
@@ -377,8 +483,11 @@ def format_error_feedback_for_history(code, errors, raw_output, simple_mode=Fals
         return "\n".join(output)
 
     # Full Reflex-langchain style format for capable models
-    syntax_errors, type_errors, linker_errors, warnings, other_messages = \
-        parse_and_categorize_errors(raw_output)
+    buckets = parse_and_categorize_errors(raw_output)
+    syntax_errors = buckets["syntax"]
+    type_errors = buckets["type"]
+    linker_errors = buckets["linker"]
+    warnings = buckets["warn"]
 
     total_errors = len(syntax_errors) + len(type_errors) + len(linker_errors)
 
@@ -388,29 +497,25 @@ def format_error_feedback_for_history(code, errors, raw_output, simple_mode=Fals
 
     if syntax_errors:
         structured_output.append(f"\n🔴 SYNTAX ERRORS ({len(syntax_errors)} total):")
-        for i, error in enumerate(syntax_errors[:10], 1):
-            structured_output.append(f"  {i}. {error}")
+        structured_output.extend(_fmt_top(syntax_errors))
         if len(syntax_errors) > 10:
             structured_output.append(f"  ... and {len(syntax_errors) - 10} more syntax errors (fix these first to resolve cascading issues)")
 
     if type_errors:
         structured_output.append(f"\n🟠 TYPE/DECLARATION ERRORS ({len(type_errors)} total):")
-        for i, error in enumerate(type_errors[:10], 1):
-            structured_output.append(f"  {i}. {error}")
+        structured_output.extend(_fmt_top(type_errors))
         if len(type_errors) > 10:
             structured_output.append(f"  ... and {len(type_errors) - 10} more type errors")
 
     if linker_errors:
         structured_output.append(f"\n🔗 LINKER ERRORS ({len(linker_errors)} total):")
-        for i, error in enumerate(linker_errors[:10], 1):
-            structured_output.append(f"  {i}. {error}")
+        structured_output.extend(_fmt_top(linker_errors))
         if len(linker_errors) > 10:
             structured_output.append(f"  ... and {len(linker_errors) - 10} more linker errors")
 
     if warnings:
         structured_output.append(f"\n⚠️ WARNINGS ({len(warnings)} total):")
-        for i, warning in enumerate(warnings[:10], 1):
-            structured_output.append(f"  {i}. {warning}")
+        structured_output.extend(_fmt_top(warnings))
         if len(warnings) > 10:
             structured_output.append(f"  ... and {len(warnings) - 10} more warnings")
 
@@ -418,23 +523,12 @@ def format_error_feedback_for_history(code, errors, raw_output, simple_mode=Fals
         structured_output.append(f"\n💡 BATCH FIXING SUGGESTIONS ({total_errors} errors total):")
 
         if syntax_errors:
-            structured_output.append("  🔴 For syntax errors:")
-            structured_output.append("    - Fix missing/extra braces, parentheses, semicolons")
-            structured_output.append("    - Check for typos in keywords and operators")
-            structured_output.append("    - Ensure proper ReflexScript syntax structure")
+            structured_output.append(_SYNTAX_FIX_TIPS)
 
         if type_errors:
-            structured_output.append("  🟠 For type/declaration errors:")
-            structured_output.append("    - Verify all variables are declared with correct types")
-            structured_output.append("    - Check unit annotations (e.g., i16[m], u8[Hz])")
-            structured_output.append("    - Ensure type compatibility in expressions")
-
-        structured_output.append("\n  📝 BATCH FIXING STRATEGY:")
-        structured_output.append("    1. Address ALL errors of the same type together")
-        structured_output.append("    2. Start with syntax errors first (they often cascade)")
-        structured_output.append("    3. Then fix type/declaration errors")
-        structured_output.append("    4. Finally address linker issues")
-        structured_output.append("    5. Re-compile to check if fixes resolved multiple errors")
+            structured_output.append(_TYPE_FIX_TIPS)
+
+        structured_output.append(_BATCH_STRATEGY_BLOCK)
 
     error_counts = []
     if syntax_errors:
@@ -465,33 +559,9 @@ def format_error_feedback_for_history(code, errors, raw_output, simple_mode=Fals
     return "\n".join(structured_output)
 
 
-def format_error_feedback(original_prompt, code, errors):
-    """Format error feedback prompt for retry."""
-    # Deduplicate errors by line number, keep first error per line
-    seen_lines = set()
-    unique_errors = []
-    for e in errors:
-        if e['line'] not in seen_lines:
-            seen_lines.add(e['line'])
-            unique_errors.append(e)
-
-    # Limit to first 10 unique errors to avoid overwhelming the LLM
-    limited_errors = unique_errors[:10]
-
-    error_lines = []
-    for e in limited_errors:
-        error_str = f"- Line {e['line']}, Column {e['column']}: [{e['type']}] {e['message']}"
-        if e.get('suggestion'):
-            error_str += f"\n  Suggestion: {e['suggestion']}"
-        error_lines.append(error_str)
-
-    errors_text = "\n".join(error_lines)
-
-    if len(unique_errors) > 10:
-        errors_text += f"\n... and {len(unique_errors) - 10} more errors on other lines"
-
-    # Include a working reference example based on Reflex-langchain essentials
-    reference_example = '''
+# Working reference example based on Reflex-langchain essentials. Kept at
+# module scope as a syntax reference for prompt authoring.
+_REFERENCE_EXAMPLE = '''
 ## WORKING EXAMPLE (use this as syntax reference)
 ```reflexscript
 reflex example_controller @(rate(100Hz), wcet(50us), stack(256bytes), bounded) {
@@ -554,19 +624,8 @@ reflex example_controller @(rate(100Hz), wcet(50us), stack(256bytes), bounded) {
 10. **Unit literals in tests**: `sensor = 200[m]` not `sensor = 200`
 '''
 
-    return f"""## TASK: Fix the compilation errors in the code below.
-
-## Original Request
-{original_prompt}
-
-## YOUR CODE (fix this code - do NOT copy the reference example)
-```reflexscript
-{code}
-```
-
-## Compiler Errors
-{errors_text}
-
+# Constant tail of the retry prompt - everything after the compiler errors
+_FEEDBACK_FOOTER = """
 ## VALID UNITS (only these work)
 `[m]` `[rad]` `[s]` `[ms]` `[Hz]` `[mps]` `[radps]` `[deg]` `[degC]` `[degF]` `[mm]` `[cm]` `[km]` `[kg]` `[g]`
 
@@ -582,10 +641,10 @@ reflex example_controller @(rate(100Hz), wcet(50us), stack(256bytes), bounded) {
 The safety block uses `variable in range` syntax, NOT type declarations:
 ```
 // WRONG - do NOT put types in safety block:
-safety {{ input: {{ target_angle: i16[rad] }} }}
+safety { input: { target_angle: i16[rad] } }
 
 // CORRECT - use ranges:
-safety {{ input: {{ target_angle in -314..314 }} }}
+safety { input: { target_angle in -314..314 } }
 ```
 
 ## Instructions
@@ -597,6 +656,49 @@ safety {{ input: {{ target_angle in -314..314 }} }}
 IMPORTANT: Output a FIXED version of the code above. Do NOT output example code or start from scratch."""
 
 
+def format_error_feedback(original_prompt, code, errors):
+    """Format error feedback prompt for retry."""
+    # Deduplicate errors by line number, keep first error per line.
+    # Only 10 are ever shown, so stop scanning as soon as we have them
+    # instead of deduplicating the full list.
+    seen_lines = set()
+    limited_errors = []
+    for e in errors:
+        if e['line'] in seen_lines:
+            continue
+        seen_lines.add(e['line'])
+        limited_errors.append(e)
+        if len(limited_errors) == 10:
+            break
+
+    error_lines = []
+    for e in limited_errors:
+        error_str = f"- Line {e['line']}, Column {e['column']}: [{e['type']}] {e['message']}"
+        if e.get('suggestion'):
+            error_str += f"\n  Suggestion: {e['suggestion']}"
+        error_lines.append(error_str)
+
+    errors_text = "\n".join(error_lines)
+
+    if len(errors) > len(limited_errors):
+        # Upper bound: the tail was not deduplicated
+        errors_text += f"\n... and up to {len(errors) - len(limited_errors)} more errors on other lines"
+
+    return f"""## TASK: Fix the compilation errors in the code below.
+
+## Original Request
+{original_prompt}
+
+## YOUR CODE (fix this code - do NOT copy the reference example)
+```reflexscript
+{code}
+```
+
+## Compiler Errors
+{errors_text}
+""" + _FEEDBACK_FOOTER
+
+
 # ============================================================================
 # Main Agent Loop
 # ============================================================================
@@ -684,9 +786,11 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
     print("=" * 60)
 
     current_code = None
+    last_written_code = None
     errors = []
     compiler_output = ""
     conversation_history = []  # Track full conversation like LangGraph
+    total_chars = 0  # Running size of the history - updated on every append
 
     for iteration in range(1, max_iterations + 1):
         print(f"\n[{iteration}/{max_iterations}] Generating ReflexScript code...")
@@ -701,6 +805,7 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
                 {"role": "user", "content": user_content}
             ]
             conversation_history = messages.copy()  # Start tracking history
+            total_chars = len(system_prompt) + len(user_content)
         else:
             # Retry with error feedback - APPEND to conversation history
             # This mirrors the LangGraph approach where tool outputs accumulate
@@ -709,13 +814,16 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
             # Create a "tool-like" message with compilation results
             error_message = format_error_feedback_for_history(current_code, errors, compiler_output, simple_mode)
             conversation_history.append({"role": "user", "content": error_message})
+            total_chars += len(error_message)
 
-            # Use the accumulated conversation history
-            messages = conversation_history.copy()
+            # Use the accumulated conversation history directly - call_vllm
+            # only serializes it, so there's no need to copy the (growing)
+            # list every iteration
+            messages = conversation_history
 
-        # Show what we're sending to the LLM
+        # Show what we're sending to the LLM (counters maintained on append,
+        # no O(history) rescan per iteration)
         msg_count = len(messages)
-        total_chars = sum(len(m.get("content", "")) for m in messages)
 
         if verbose:
             print("\n" + "=" * 60)
@@ -745,10 +853,10 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
                 (prompt_dir / "system_prompt.md").write_text(system_prompt)
                 print(f"  Saved system prompt to: {prompt_dir / 'system_prompt.md'}")
 
-            # Save full conversation for this iteration
-            import json
+            # Save full conversation for this iteration (compact - the dump
+            # grows with the whole history, and it's machine-readable debug)
             conv_file = prompt_dir / f"conversation_iter{iteration}.json"
-            conv_file.write_text(json.dumps(messages, indent=2))
+            conv_file.write_text(json.dumps(messages))
             print(f"  Saved conversation to: {conv_file}")
 
         # Call LLM
@@ -762,6 +870,7 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
 
         # Add assistant response to conversation history (like LangGraph does)
         conversation_history.append({"role": "assistant", "content": response})
+        total_chars += len(response)
 
         # Extract code
         code = extract_code_from_response(response)
@@ -774,8 +883,11 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
 
         current_code = code
 
-        # Write to file
-        write_rfx_file(code, output_path)
+        # Write to file - skip the write (and the recompile input churn)
+        # when the LLM re-emitted identical code
+        if code != last_written_code:
+            write_rfx_file(code, output_path)
+            last_written_code = code
 
         # Compile
         print(f"\n[{iteration}/{max_iterations}] Compiling with reflexc...")
@@ -812,6 +924,10 @@ def agent_loop(system_prompt_path, prompt_path, output_path, max_iterations,
 # ============================================================================
 
 def main():
+    # Imported lazily: batch drivers import this module for agent_loop()
+    # and never touch the CLI
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="ReflexScript Agent Loop - Iteratively generates syntactically correct code",
         formatter_class=argparse.RawDescriptionHelpFormatter,
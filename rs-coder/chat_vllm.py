@@ -5,19 +5,227 @@ Usage: python3 chat_vllm.py [--host HOST] [--port PORT] [--prompt-file FILE] [--
 """
 
 import argparse
+import asyncio
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import json
 import sys
+from dataclasses import dataclass, field
 from pathlib import Path
 
-def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_file=None, temperature=0.1):
+# aiohttp gives non-blocking streaming and lets batch mode run many prompts
+# concurrently over one keep-alive session; without it we fall back to the
+# synchronous requests path
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# orjson decodes the per-token SSE chunks noticeably faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Large read buffer so big SSE chunks aren't throttled by the 64 KB default
+AIOHTTP_READ_BUFSIZE = 4 * 1024 * 1024
+
+# SSE lines are matched as raw bytes - no per-line decode for keepalives
+_DATA_PREFIX = b'data: '
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Response cache for repeated one-shot prompts in dev loops: identical
+# (model, messages) pairs skip the model call entirely. Opt-in via --cache.
+CACHE_DIR = Path.home() / ".cache" / "rs-coder" / "responses"
+_response_cache = {}
+
+
+def _cache_key(model, messages):
+    payload = json.dumps([model, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_lookup(model, messages):
+    """Return the cached response text for this request, or None."""
+    key = _cache_key(model, messages)
+    if key in _response_cache:
+        return _response_cache[key]
+    path = CACHE_DIR / f"{key}.txt"
+    try:
+        text = path.read_text()
+    except OSError:
+        return None
+    _response_cache[key] = text
+    return text
+
+
+def cache_store(model, messages, text):
+    """Persist a finished response to RAM and disk."""
+    key = _cache_key(model, messages)
+    _response_cache[key] = text
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (CACHE_DIR / f"{key}.txt").write_text(text)
+    except OSError:
+        pass  # Cache is best-effort
+
+
+@dataclass
+class StableBuffer:
+    """Conversation history ordered for vLLM Automatic Prefix Caching.
+
+    The system prompt and committed turns form a byte-stable, append-only
+    prefix across requests; anything dynamic (re-read context files) is
+    always serialized last so it never invalidates the server's cached
+    prefix KV. Run the server with --enable-prefix-caching to benefit:
+    prefill for turn N then only pays for the new tail.
+    """
+    static_system: list = field(default_factory=list)
+    committed: list = field(default_factory=list)
+    dynamic: list = field(default_factory=list)
+
+    def messages(self):
+        """Serialize as [static system] + committed turns + dynamic tail."""
+        return self.static_system + self.committed + self.dynamic
+
+    def commit(self, role, content):
+        """Append a finished turn to the stable prefix (never mutated later)."""
+        self.committed.append({"role": role, "content": content})
+
+    def __len__(self):
+        return len(self.static_system) + len(self.committed) + len(self.dynamic)
+
+
+def sse_data_lines(response):
+    """Yield the payload of each 'data:' line from a streaming response.
+
+    Reads the socket in 64 KB chunks and carries the unfinished tail between
+    reads, so fast token streams don't pay iter_lines()'s per-line buffer
+    re-scans and small-object churn.
+    """
+    buf = b''
+    for chunk in response.iter_content(chunk_size=65536):
+        buf += chunk
+        start = 0
+        while True:
+            idx = buf.find(b'\n', start)
+            if idx < 0:
+                break
+            line = buf[start:idx].rstrip(b'\r')
+            start = idx + 1
+            if line.startswith(_DATA_PREFIX):
+                yield line[6:]
+        if start:
+            buf = buf[start:]
+
+
+async def stream_chat_async(session, base_url, payload, printer=None):
+    """Stream one chat completion over an aiohttp session.
+
+    Returns the accumulated assistant message. ``printer`` (if given) is
+    called with each content delta as it arrives.
+    """
+    parts = []
+    async with session.post(f"{base_url}/v1/chat/completions", json=payload,
+                            timeout=aiohttp.ClientTimeout(total=300)) as response:
+        if response.status != 200:
+            text = await response.text()
+            raise RuntimeError(f"vLLM returned {response.status}: {text}")
+
+        async for line in response.content:
+            line = line.rstrip(b'\r\n')
+            if not line.startswith(_DATA_PREFIX):
+                continue
+            data = line[6:]
+            if data == b'[DONE]':
+                break
+            try:
+                chunk = _loads(data)
+            except ValueError:
+                continue
+            content = chunk['choices'][0]['delta'].get('content')
+            if content:
+                if printer:
+                    printer(content)
+                parts.append(content)
+
+    return ''.join(parts)
+
+
+async def run_batch(host, port, batch_file, system_prompt_file=None,
+                    temperature=0.1, max_tokens=4096):
+    """Run every prompt in batch_file (one per line) concurrently.
+
+    All requests share one keep-alive session, so vLLM can batch them
+    server-side and the client pays connection setup only once.
+    """
+    base_url = f"http://{host}:{port}"
+
+    prompts = [line.strip() for line in Path(batch_file).read_text().splitlines()
+               if line.strip()]
+    if not prompts:
+        print(f"❌ No prompts found in {batch_file}")
+        sys.exit(1)
+
+    system_messages = []
+    if system_prompt_file:
+        system_prompt = Path(system_prompt_file).read_text().strip()
+        system_messages.append({"role": "system", "content": system_prompt})
+
+    async with aiohttp.ClientSession(read_bufsize=AIOHTTP_READ_BUFSIZE) as session:
+        # Resolve model name once over the shared session
+        try:
+            async with session.get(f"{base_url}/v1/models") as resp:
+                models = await resp.json()
+                model_name = models["data"][0]["id"]
+        except Exception:
+            model_name = "deepseek-coder-v2-lite-instruct-fp8"
+
+        print(f"✓ Running {len(prompts)} prompts against {model_name}\n")
+
+        tasks = []
+        for prompt in prompts:
+            payload = {
+                "model": model_name,
+                "messages": system_messages + [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": True
+            }
+            tasks.append(stream_chat_async(session, base_url, payload))
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for i, (prompt, result) in enumerate(zip(prompts, results), 1):
+        print("=" * 80)
+        print(f"[{i}/{len(prompts)}] {prompt[:80]}")
+        print("-" * 80)
+        if isinstance(result, Exception):
+            print(f"❌ Error: {result}")
+        else:
+            print(result)
+    print("=" * 80)
+
+
+def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_file=None,
+                   temperature=0.1, dynamic_context_file=None, use_cache=False):
     """Interactive chat session with vLLM server"""
 
     base_url = f"http://{host}:{port}"
 
+    # One pooled session with keep-alive for every call in this chat -
+    # module-level requests.get/post would reconnect on each turn
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                          max_retries=Retry(total=3, backoff_factor=0.1))
+    session.mount("http://", adapter)
+
     # Check if server is running
     try:
-        health_response = requests.get(f"{base_url}/health", timeout=5)
+        health_response = session.get(f"{base_url}/health", timeout=5)
         if health_response.status_code != 200:
             print(f"❌ vLLM server not healthy at {base_url}")
             sys.exit(1)
@@ -29,7 +237,7 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
 
     # Get model info
     try:
-        models_response = requests.get(f"{base_url}/v1/models")
+        models_response = session.get(f"{base_url}/v1/models")
         models = models_response.json()
         model_name = models["data"][0]["id"]
         print(f"✓ Using model: {model_name}")
@@ -37,14 +245,14 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
         model_name = "deepseek-coder-v2-lite-instruct-fp8"
         print(f"✓ Using default model name: {model_name}")
 
-    # Initialize conversation history
-    conversation_history = []
+    # Initialize conversation history with prefix-cache-friendly ordering
+    history = StableBuffer()
 
     # Load system prompt if provided
     if system_prompt_file:
         try:
             system_prompt = Path(system_prompt_file).read_text().strip()
-            conversation_history.append({
+            history.static_system.append({
                 "role": "system",
                 "content": system_prompt
             })
@@ -53,6 +261,18 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
             print(f"❌ Error loading system prompt: {e}")
             sys.exit(1)
 
+    def refresh_dynamic_context():
+        """Re-read the dynamic context file and place it at the tail only,
+        so the committed prefix stays byte-stable for the server's cache."""
+        if not dynamic_context_file:
+            return
+        try:
+            context = Path(dynamic_context_file).read_text().strip()
+        except Exception as e:
+            print(f"❌ Error reading dynamic context: {e}")
+            return
+        history.dynamic = [{"role": "system", "content": context}] if context else []
+
     # One-shot mode if prompt file is provided
     if prompt_file:
         try:
@@ -63,15 +283,13 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
             print("="*80 + "\n")
 
             # Add user prompt to history
-            conversation_history.append({
-                "role": "user",
-                "content": user_prompt
-            })
+            history.commit("user", user_prompt)
+            refresh_dynamic_context()
 
             # Make request
             payload = {
                 "model": model_name,
-                "messages": conversation_history,
+                "messages": history.messages(),
                 "max_tokens": 4096,
                 "temperature": temperature,
                 "stream": True
@@ -80,39 +298,53 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
             print("Response:\n")
             print("-" * 80)
 
-            response = requests.post(
-                f"{base_url}/v1/chat/completions",
-                json=payload,
-                stream=True,
-                timeout=300
-            )
-
-            if response.status_code != 200:
-                print(f"\n❌ Error: {response.status_code}")
-                print(response.text)
-                sys.exit(1)
-
-            # Stream the response
-            assistant_message = ""
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode('utf-8')
-                    if line.startswith('data: '):
-                        data = line[6:]
-                        if data == '[DONE]':
-                            break
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk['choices'][0]['delta']
-                            if 'content' in delta:
-                                content = delta['content']
-                                print(content, end="", flush=True)
-                                assistant_message += content
-                        except json.JSONDecodeError:
-                            continue
+            cached = cache_lookup(model_name, payload["messages"]) if use_cache else None
+            if cached is not None:
+                # Same print path as streaming, so the UX is identical
+                print(cached, end="", flush=True)
+                assistant_message = cached
+            elif aiohttp is not None:
+                # Non-blocking streaming path
+                async def _one_shot():
+                    async with aiohttp.ClientSession(read_bufsize=AIOHTTP_READ_BUFSIZE) as session:
+                        return await stream_chat_async(
+                            session, base_url, payload,
+                            printer=lambda c: print(c, end="", flush=True))
+
+                assistant_message = asyncio.run(_one_shot())
+            else:
+                response = session.post(
+                    f"{base_url}/v1/chat/completions",
+                    json=payload,
+                    stream=True,
+                    timeout=300
+                )
+
+                if response.status_code != 200:
+                    print(f"\n❌ Error: {response.status_code}")
+                    print(response.text)
+                    sys.exit(1)
+
+                # Stream the response - JSON decodes straight from bytes
+                assistant_message = ""
+                for data in sse_data_lines(response):
+                    if data == b'[DONE]':
+                        break
+                    try:
+                        chunk = _loads(data)
+                    except ValueError:
+                        continue
+                    content = chunk['choices'][0]['delta'].get('content')
+                    if content:
+                        print(content, end="", flush=True)
+                        assistant_message += content
+
+            if use_cache and cached is None and assistant_message:
+                cache_store(model_name, payload["messages"], assistant_message)
 
             print("\n" + "-" * 80)
-            print(f"\n✓ Response complete ({len(assistant_message)} characters)")
+            suffix = ", cached" if cached is not None else ""
+            print(f"\n✓ Response complete ({len(assistant_message)} characters{suffix})")
             return
 
         except FileNotFoundError:
@@ -146,15 +378,15 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
                 break
 
             if user_input.lower() == 'clear':
-                # Preserve system prompt if it exists
-                system_messages = [m for m in conversation_history if m.get("role") == "system"]
-                conversation_history = system_messages
+                # The static system prefix is kept by construction
+                history.committed = []
+                history.dynamic = []
                 print("\n✓ Conversation cleared (system prompt preserved)\n")
                 continue
 
             if user_input.lower() == 'history':
-                print(f"\n--- Conversation History ({len(conversation_history)} messages) ---")
-                for i, msg in enumerate(conversation_history):
+                print(f"\n--- Conversation History ({len(history)} messages) ---")
+                for i, msg in enumerate(history.messages()):
                     role = msg.get("role", "unknown")
                     content = msg.get("content", "")
                     # Truncate long messages for display
@@ -164,16 +396,15 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
                 print("--- End History ---\n")
                 continue
 
-            # Add user message to history
-            conversation_history.append({
-                "role": "user",
-                "content": user_input
-            })
+            # Add user message to the stable prefix; dynamic context goes
+            # at the tail so turn N reuses turn N-1's cached prefill
+            history.commit("user", user_input)
+            refresh_dynamic_context()
 
             # Prepare request
             payload = {
                 "model": model_name,
-                "messages": conversation_history,
+                "messages": history.messages(),
                 "max_tokens": 2048,
                 "temperature": temperature,
                 "stream": True
@@ -182,7 +413,7 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
             # Send request
             print("Assistant: ", end="", flush=True)
 
-            response = requests.post(
+            response = session.post(
                 f"{base_url}/v1/chat/completions",
                 json=payload,
                 stream=True,
@@ -194,33 +425,25 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
                 print(response.text)
                 continue
 
-            # Stream the response
+            # Stream the response - same bytes-level loop as one-shot mode
             assistant_message = ""
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode('utf-8')
-                    if line.startswith('data: '):
-                        data = line[6:]  # Remove 'data: ' prefix
-                        if data == '[DONE]':
-                            break
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk['choices'][0]['delta']
-                            if 'content' in delta:
-                                content = delta['content']
-                                print(content, end="", flush=True)
-                                assistant_message += content
-                        except json.JSONDecodeError:
-                            continue
+            for data in sse_data_lines(response):
+                if data == b'[DONE]':
+                    break
+                try:
+                    chunk = _loads(data)
+                except ValueError:
+                    continue
+                content = chunk['choices'][0]['delta'].get('content')
+                if content:
+                    print(content, end="", flush=True)
+                    assistant_message += content
 
             print("\n")
 
             # Add assistant response to history
             if assistant_message:
-                conversation_history.append({
-                    "role": "assistant",
-                    "content": assistant_message
-                })
+                history.commit("assistant", assistant_message)
 
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
@@ -228,18 +451,18 @@ def chat_with_vllm(host="localhost", port=8000, prompt_file=None, system_prompt_
         except requests.exceptions.Timeout:
             print("\n❌ Request timed out. The model might be overloaded.")
             # Remove the failed user message from history
-            if conversation_history and conversation_history[-1].get("role") == "user":
-                conversation_history.pop()
+            if history.committed and history.committed[-1].get("role") == "user":
+                history.committed.pop()
         except requests.exceptions.RequestException as e:
             print(f"\n❌ Request error: {e}")
             # Remove the failed user message from history
-            if conversation_history and conversation_history[-1].get("role") == "user":
-                conversation_history.pop()
+            if history.committed and history.committed[-1].get("role") == "user":
+                history.committed.pop()
         except Exception as e:
             print(f"\n❌ Unexpected error: {e}")
             # Remove the failed user message from history
-            if conversation_history and conversation_history[-1].get("role") == "user":
-                conversation_history.pop()
+            if history.committed and history.committed[-1].get("role") == "user":
+                history.committed.pop()
 
 def main():
     parser = argparse.ArgumentParser(
@@ -290,12 +513,26 @@ Examples:
         help='File containing the prompt (enables one-shot mode)'
     )
 
+    parser.add_argument(
+        '--batch-file',
+        type=str,
+        help='File with one prompt per line; all prompts run concurrently (requires aiohttp)'
+    )
+
     parser.add_argument(
         '--system-prompt',
         type=str,
         help='File containing the system prompt (optional)'
     )
 
+    parser.add_argument(
+        '--dynamic-context-file',
+        type=str,
+        help='File re-read every turn and appended after the stable history, '
+             'so it never invalidates the server prefix cache '
+             '(serve vLLM with --enable-prefix-caching)'
+    )
+
     parser.add_argument(
         '--temperature',
         type=float,
@@ -303,9 +540,26 @@ Examples:
         help='Temperature for generation (default: 0.1)'
     )
 
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Cache one-shot responses under ~/.cache/rs-coder/responses/ '
+             'keyed by (model, messages); identical reruns skip the model call'
+    )
+
     args = parser.parse_args()
 
-    chat_with_vllm(args.host, args.port, args.prompt_file, args.system_prompt, args.temperature)
+    if args.batch_file:
+        if aiohttp is None:
+            print("❌ Batch mode requires aiohttp")
+            print("Install with: pip install aiohttp")
+            sys.exit(1)
+        asyncio.run(run_batch(args.host, args.port, args.batch_file,
+                              args.system_prompt, args.temperature))
+        return
+
+    chat_with_vllm(args.host, args.port, args.prompt_file, args.system_prompt,
+                   args.temperature, args.dynamic_context_file, args.cache)
 
 if __name__ == "__main__":
     main()
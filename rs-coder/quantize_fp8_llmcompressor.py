@@ -35,7 +35,27 @@ def check_and_install_llmcompressor():
             print(f"❌ Failed to install: {e}")
             return False
 
-def quantize_to_fp8(model_path, output_path):
+def dir_size(path):
+    """Total size in bytes of all files under path (os.scandir recursion)."""
+    total = 0
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+def human_size(num_bytes):
+    """Format a byte count the way du -h would"""
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if num_bytes < 1024 or unit == 'T':
+            return f"{num_bytes:.1f}{unit}" if unit != 'B' else f"{num_bytes}B"
+        num_bytes /= 1024
+
+def quantize_to_fp8(model_path, output_path, offload_dir=None):
     """Quantize model to FP8 using llm-compressor (the RIGHT way)"""
 
     print_banner("FP8 Quantization using llm-compressor")
@@ -55,12 +75,24 @@ def quantize_to_fp8(model_path, output_path):
 
     print("\n[2/5] Loading model...")
     print("  This may take several minutes...")
+    # With --offload-dir, weights that don't fit in RAM stream through
+    # disk instead of materialising the whole FP16 checkpoint - keeps
+    # peak memory near one shard's worth on smaller hosts
+    load_kwargs = {}
+    if offload_dir:
+        os.makedirs(offload_dir, exist_ok=True)
+        load_kwargs = {
+            "offload_folder": offload_dir,
+            "offload_state_dict": True,
+        }
+        print(f"  Offloading through: {offload_dir}")
     model = AutoModelForCausalLM.from_pretrained(
         model_path,
         device_map="auto",
         torch_dtype="auto",
         trust_remote_code=True,
-        low_cpu_mem_usage=True
+        low_cpu_mem_usage=True,
+        **load_kwargs
     )
     print("✓ Model loaded")
 
@@ -89,6 +121,24 @@ def quantize_to_fp8(model_path, output_path):
     print("  " + "-" * 76)
     print("✓ Model quantized to FP8")
 
+    # Re-save each shard with contiguous tensor layout so vLLM's mmap
+    # loader can stream reads sequentially at cold-start (llm-compressor
+    # already shards at ~5GB; layout is what it doesn't guarantee)
+    try:
+        import glob
+        from safetensors.torch import load_file, save_file
+
+        shards = sorted(glob.glob(os.path.join(output_path, "*.safetensors")))
+        for shard in shards:
+            tensors = load_file(shard)
+            save_file({k: v.contiguous() for k, v in tensors.items()},
+                      shard, metadata={"format": "pt"})
+            del tensors
+        if shards:
+            print(f"✓ Rewrote {len(shards)} shard(s) with contiguous layout")
+    except Exception as e:
+        print(f"  Shard rewrite skipped: {e}")
+
     print("\n[5/5] Saving tokenizer and metadata...")
     tokenizer.save_pretrained(output_path)
 
@@ -110,10 +160,17 @@ def quantize_to_fp8(model_path, output_path):
 
     print("✓ Saved successfully")
 
-    # Get output size
-    import subprocess
-    result = subprocess.run(['du', '-sh', output_path], capture_output=True, text=True)
-    size = result.stdout.split('\t')[0] if result.returncode == 0 else "Unknown"
+    # The FP16 copy is no longer needed once the compressed checkpoint is
+    # on disk - release it before the size report
+    del model
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+    # Get output size (in-process, works everywhere)
+    try:
+        size = human_size(dir_size(output_path))
+    except OSError:
+        size = "Unknown"
 
     print_banner("QUANTIZATION COMPLETE!")
     print(f"Quantization method:  FP8 (llm-compressor)")
@@ -125,7 +182,10 @@ def quantize_to_fp8(model_path, output_path):
     print(f"  vllm serve {output_path} \\")
     print(f"      --quantization fp8 \\")
     print(f"      --max-model-len 8192 \\")
-    print(f"      --gpu-memory-utilization 0.9")
+    print(f"      --gpu-memory-utilization 0.9 \\")
+    print(f"      --load-format safetensors")
+    print(f"\nFor the fastest cold-start add --enforce-eager (skips CUDA")
+    print(f"graph capture; trades a little steady-state speed for warm-up).")
     print(f"\nExpected Performance:")
     print(f"  Memory usage: 17-20GB")
     print(f"  Speed: 50-90 tokens/sec")
@@ -169,6 +229,13 @@ After quantization, transfer to Jetson and run:
         help='Path to save quantized model'
     )
 
+    parser.add_argument(
+        '--offload-dir',
+        type=str,
+        default=None,
+        help='Stream weights through this directory during load (cuts peak RAM)'
+    )
+
     args = parser.parse_args()
 
     if not os.path.exists(args.model_path):
@@ -192,7 +259,8 @@ After quantization, transfer to Jetson and run:
         sys.exit(0)
 
     try:
-        quantize_to_fp8(args.model_path, args.output_path)
+        quantize_to_fp8(args.model_path, args.output_path,
+                        offload_dir=args.offload_dir)
     except KeyboardInterrupt:
         print("\n\nInterrupted by user.")
         sys.exit(1)
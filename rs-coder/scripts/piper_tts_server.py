@@ -5,16 +5,37 @@ Uses Python API with persistent model loading for low latency.
 Supports CUDA acceleration on Jetson.
 """
 
-import io
 import json
-import wave
 import argparse
+import hashlib
+import queue
+import re
+import struct
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 import os
 import socketserver
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson parses bytes directly (no intermediate str decode) and emits
+# bytes; stdlib json is the fallback behind the same two helpers
+if orjson is not None:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
 # Configuration
 DEFAULT_PORT = 7860
 DEFAULT_VOICE = os.path.expanduser("~/.local/share/piper-voices/en_US-amy-medium.onnx")
@@ -24,16 +45,220 @@ voice = None
 voice_config = None
 use_cuda = False
 
+# Bounded pool for ONNX synthesis. ThreadingHTTPServer spawns a thread per
+# request, but unbounded concurrent synthesize() calls just fight over the
+# session (and oversubscribe CUDA), so inference goes through this pool:
+# two workers on GPU (phonemize/infer pipelining), a few on CPU where
+# ORT's intra-op threads do the rest.
+synth_pool = None
+
+# Micro-batching collector in front of the pool (created in load_voice)
+tts_batcher = None
+
+# Separate small pool for intra-request sentence parallelism on CPU (a
+# second pool avoids deadlocking synth_pool workers waiting on their own
+# queue). Stays None on CUDA, where the session is serialized anyway.
+sentence_pool = None
+
+# Piper phonemizes through espeak-ng, which keeps global state and is
+# not safe to call from two threads at once - concurrent calls can
+# garble phoneme output or crash natively. All the pools above funnel
+# the phonemize stage through this lock; ONNX inference (thread-safe)
+# still overlaps freely.
+phonemize_lock = threading.Lock()
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Targeted field extraction for the common {"text": ..., "speed": ...}
+# body shape - bodies from Gradio/agent clients can carry KBs of metadata
+# that full json.loads would deserialize for nothing
+_TEXT_FIELD_RE = re.compile(rb'"text"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_SPEED_FIELD_RE = re.compile(rb'"speed"\s*:\s*"?(-?[0-9.eE+]+)')
+_STREAM_FIELD_RE = re.compile(rb'"stream"\s*:\s*(?:true|"true"|1)')
+
+
+def extract_tts_fields(body):
+    """Pull (text, speed, stream) out of a JSON body without full parsing.
+
+    Returns None when the fast path doesn't apply (Gradio data[0] format,
+    form-encoded bodies, ...) and the caller should fall back to json.loads.
+    """
+    match = _TEXT_FIELD_RE.search(body)
+    if not match:
+        return None
+    raw = match.group(1)
+    try:
+        if b'\\' in raw:
+            # Re-quote and let json handle escapes (incl. \uXXXX) correctly
+            text = _json_loads(b'"' + raw + b'"')
+        else:
+            text = raw.decode('utf-8')
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+    speed_match = _SPEED_FIELD_RE.search(body)
+    try:
+        speed = float(speed_match.group(1)) if speed_match else 1.0
+    except ValueError:
+        return None
+
+    return text, speed, _STREAM_FIELD_RE.search(body) is not None
+
+# 44-byte mono/16-bit WAV header template, built once in load_voice when the
+# sample rate is known; per request only the two length fields get patched
+wav_header_template = None
+
+_RIFF_SIZE_OFFSET = 4   # ChunkSize
+_DATA_SIZE_OFFSET = 40  # Subchunk2Size
+
+# Finished-WAV cache keyed by (voice, text, speed). Repeated requests -
+# common from the index page's test button and scripted agents - skip ONNX
+# inference and WAV assembly entirely. RAM LRU always on; --cache-dir adds
+# disk persistence across restarts.
+TTS_CACHE_MAXSIZE = 512
+tts_cache = OrderedDict()
+tts_cache_lock = threading.Lock()
+cache_dir = None
+voice_path = None  # set in load_voice, part of the cache key
+
+# Per-request logging is surprisingly expensive next to a cached WAV hit
+# (timestamp formatting + stderr write per request). Handlers drop a raw
+# tuple on this queue and a background thread does the formatting; --quiet
+# skips even that.
+quiet = False
+log_queue = queue.Queue()
+
+
+def _log_writer():
+    while True:
+        requestline, code = log_queue.get()
+        print(f"[TTS] {requestline} {code}")
+
+
+def start_log_writer():
+    threading.Thread(target=_log_writer, daemon=True,
+                     name="tts-log").start()
+
+
+def tts_cache_key(text, speed):
+    return hashlib.sha256(f"{voice_path}|{speed}|{text}".encode()).hexdigest()
+
+
+def tts_cache_get(key):
+    """Return cached WAV bytes for key, or None."""
+    with tts_cache_lock:
+        wav = tts_cache.get(key)
+        if wav is not None:
+            tts_cache.move_to_end(key)
+            return wav
+    if cache_dir:
+        try:
+            with open(os.path.join(cache_dir, key + ".wav"), 'rb') as f:
+                wav = f.read()
+        except OSError:
+            return None
+        with tts_cache_lock:
+            tts_cache[key] = wav
+        return wav
+    return None
+
+
+def tts_cache_put(key, wav):
+    with tts_cache_lock:
+        tts_cache[key] = wav
+        tts_cache.move_to_end(key)
+        while len(tts_cache) > TTS_CACHE_MAXSIZE:
+            tts_cache.popitem(last=False)
+    if cache_dir:
+        try:
+            with open(os.path.join(cache_dir, key + ".wav"), 'wb') as f:
+                f.write(wav)
+        except OSError:
+            pass  # Cache is best-effort
+
+
+def build_wav_header_template(sample_rate):
+    """Build the constant parts of a mono 16-bit PCM WAV header."""
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 0, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', 0)
+
+
+def wav_header_for(data_size):
+    """Copy the template and patch in the length fields for data_size."""
+    header = bytearray(wav_header_template)
+    struct.pack_into('<I', header, _RIFF_SIZE_OFFSET, 36 + data_size)
+    struct.pack_into('<I', header, _DATA_SIZE_OFFSET, data_size)
+    return bytes(header)
+
+
+class TTSBatcher:
+    """Collect concurrent synthesis requests into micro-batches.
+
+    Pending (text, speed) pairs are gathered for up to timeout_ms (or until
+    max_batch are waiting) and dispatched as one group to the synthesis
+    pool. PiperVoice exposes no batched inference entry point, so the group
+    runs back-to-back on the shared session - one collector wakeup per
+    group, arrival-order fairness, and on CPU the group fans out across the
+    pool workers in parallel.
+    """
+
+    def __init__(self, max_batch=8, timeout_ms=50):
+        self.max_batch = max_batch
+        self.timeout = timeout_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="tts-batcher")
+        self._thread.start()
+
+    def submit(self, text, speed):
+        """Enqueue a request; returns a Future resolving to WAV bytes."""
+        future = Future()
+        self._queue.put((text, speed, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.timeout
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Fan the group out to the pool, then relay results in order
+            pool_futures = [synth_pool.submit(synthesize_wav, text, speed)
+                            for text, speed, _ in batch]
+            for (_, _, future), pool_future in zip(batch, pool_futures):
+                try:
+                    future.set_result(pool_future.result())
+                except Exception as e:
+                    future.set_exception(e)
+
 
 class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
     """HTTP server that handles each request in a new thread."""
     daemon_threads = True
     allow_reuse_address = True
+    # Deeper accept backlog so concurrent clients aren't refused while
+    # synthesis workers drain the queue
+    request_queue_size = 64
 
 
 class TTSHandler(BaseHTTPRequestHandler):
     """HTTP handler for TTS requests."""
 
+    # Send audio bytes as soon as they're written instead of letting Nagle
+    # hold small segments back - matters for the streaming path's first
+    # sentence and for small cached WAVs
+    disable_nagle_algorithm = True
+
     def _set_cors_headers(self):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
@@ -58,7 +283,7 @@ class TTSHandler(BaseHTTPRequestHandler):
                 "cuda": use_cuda,
                 "model_loaded": voice is not None
             }
-            self.wfile.write(json.dumps(info).encode())
+            self.wfile.write(_json_dumps(info))
             return
 
         if parsed.path == '/api/voices':
@@ -67,7 +292,7 @@ class TTSHandler(BaseHTTPRequestHandler):
             self._set_cors_headers()
             self.end_headers()
             voices = self._list_voices()
-            self.wfile.write(json.dumps({"voices": voices}).encode())
+            self.wfile.write(_json_dumps({"voices": voices}))
             return
 
         # Serve info page
@@ -94,36 +319,54 @@ class TTSHandler(BaseHTTPRequestHandler):
         """Handle TTS synthesis request."""
         try:
             content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
-
-            # Parse request
-            try:
-                data = json.loads(body)
-            except json.JSONDecodeError:
-                # Try form data
-                data = parse_qs(body)
-                data = {k: v[0] for k, v in data.items()}
-
-            # Extract text - support multiple formats
-            text = None
-            if 'text' in data:
-                text = data['text']
-            elif 'data' in data and isinstance(data['data'], list):
-                # Gradio format: data[0] is text
-                text = data['data'][0]
-            elif 'input' in data:
-                text = data['input']
+            body = self.rfile.read(content_length)
+
+            # Fast path: lift text/speed/stream straight out of the bytes
+            fields = extract_tts_fields(body)
+            if fields is not None:
+                text, speed, stream = fields
+            else:
+                # Full parse for the other supported body shapes
+                try:
+                    data = _json_loads(body)
+                except ValueError:
+                    # Try form data
+                    data = parse_qs(body.decode('utf-8'))
+                    data = {k: v[0] for k, v in data.items()}
+
+                # Extract text - support multiple formats
+                text = None
+                if 'text' in data:
+                    text = data['text']
+                elif 'data' in data and isinstance(data['data'], list):
+                    # Gradio format: data[0] is text
+                    text = data['data'][0]
+                elif 'input' in data:
+                    text = data['input']
+
+                speed = float(data.get('speed', 1.0))
+                stream = bool(data.get('stream'))
 
             if not text:
                 self.send_error(400, "Missing 'text' parameter")
                 return
 
-            # Get optional parameters
-            speed = float(data.get('speed', 1.0))
+            # Streaming mode: flush audio per sentence as it is produced,
+            # so playback starts before the full utterance is synthesized
+            if stream:
+                self._stream_tts(text, speed)
+                return
 
-            # Synthesize using persistent model
+            # Synthesize using persistent model - the batcher groups
+            # concurrent requests and feeds the bounded pool. Cached
+            # (voice, text, speed) hits skip synthesis entirely.
             start_time = time.time()
-            audio_data = self._synthesize(text, speed)
+            key = tts_cache_key(text, speed)
+            audio_data = tts_cache_get(key)
+            if audio_data is None:
+                audio_data = tts_batcher.submit(text, speed).result()
+                if audio_data:
+                    tts_cache_put(key, audio_data)
             elapsed_ms = (time.time() - start_time) * 1000
 
             if audio_data:
@@ -143,50 +386,37 @@ class TTSHandler(BaseHTTPRequestHandler):
             traceback.print_exc()
             self.send_error(500, str(e))
 
-    def _synthesize(self, text, speed):
-        """Synthesize using persistent PiperVoice model."""
-        global voice
+    def _stream_tts(self, text, speed):
+        """Stream synthesized audio chunk-by-chunk as piper yields it.
 
-        if voice is None:
-            print("Error: Voice model not loaded")
-            return None
+        Emits a WAV header with 0xFFFFFFFF length fields (the streaming
+        convention for unknown length) and flushes each sentence's PCM
+        immediately. No Content-Length is sent; the connection close
+        delimits the body. Cuts time-to-first-audio from full-utterance
+        latency to one sentence.
+        """
+        from piper.config import SynthesisConfig
 
-        try:
-            from piper.config import SynthesisConfig
+        length_scale = 1.0 / speed if speed > 0 else 1.0
+        syn_config = SynthesisConfig(length_scale=length_scale)
 
-            # Calculate length_scale (inverse of speed)
-            length_scale = 1.0 / speed if speed > 0 else 1.0
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/wav')
+        self._set_cors_headers()
+        self.end_headers()
 
-            # Create synthesis config
-            syn_config = SynthesisConfig(length_scale=length_scale)
+        # Unknown-length sentinels in the streamed header
+        header = bytearray(wav_header_template)
+        struct.pack_into('<I', header, _RIFF_SIZE_OFFSET, 0xFFFFFFFF)
+        struct.pack_into('<I', header, _DATA_SIZE_OFFSET, 0xFFFFFFFF)
 
-            # Synthesize - returns generator of AudioChunk (one per sentence)
-            audio_bytes_list = []
+        try:
+            self.wfile.write(header)
             for audio_chunk in voice.synthesize(text, syn_config):
-                # AudioChunk has audio_int16_bytes property
-                audio_bytes_list.append(audio_chunk.audio_int16_bytes)
-
-            if not audio_bytes_list:
-                return None
-
-            # Combine all chunks
-            raw_audio = b''.join(audio_bytes_list)
-
-            # Convert raw PCM to WAV
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav:
-                wav.setnchannels(1)
-                wav.setsampwidth(2)  # 16-bit
-                wav.setframerate(voice_config.sample_rate)
-                wav.writeframes(raw_audio)
-
-            return wav_buffer.getvalue()
-
-        except Exception as e:
-            print(f"Synthesis error: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+                self.wfile.write(audio_chunk.audio_int16_bytes)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped listening mid-stream
 
     def _list_voices(self):
         """List available voice models."""
@@ -247,7 +477,15 @@ async function speak() {{
 </body>
 </html>"""
 
+    def log_request(self, code='-', size='-'):
+        """Hand the record to the log thread; no formatting on this path."""
+        if quiet:
+            return
+        log_queue.put((self.requestline, getattr(code, 'value', code)))
+
     def log_message(self, format, *args):
+        if quiet:
+            return
         print(f"[TTS] {args[0]}")
 
     def address_string(self):
@@ -255,9 +493,137 @@ async function speak() {{
         return self.client_address[0]
 
 
+def _synthesize_pcm(text, syn_config):
+    """Run piper over one text fragment and return its raw PCM bytes."""
+    # AudioChunk has audio_int16_bytes property
+    return b''.join(chunk.audio_int16_bytes
+                    for chunk in voice.synthesize(text, syn_config))
+
+
+def synthesize_wav(text, speed):
+    """Synthesize using the persistent PiperVoice model."""
+    if voice is None:
+        print("Error: Voice model not loaded")
+        return None
+
+    try:
+        from piper.config import SynthesisConfig
+
+        # Calculate length_scale (inverse of speed)
+        length_scale = 1.0 / speed if speed > 0 else 1.0
+
+        # Create synthesis config
+        syn_config = SynthesisConfig(length_scale=length_scale)
+
+        # Multi-sentence texts fan out across the sentence pool on CPU and
+        # are re-concatenated in order; single sentences (and CUDA) run
+        # inline
+        sentences = [s for s in _SENTENCE_SPLIT_RE.split(text.strip()) if s]
+        if sentence_pool is not None and len(sentences) > 1:
+            futures = [sentence_pool.submit(_synthesize_pcm, s, syn_config)
+                       for s in sentences]
+            raw_audio = b''.join(f.result() for f in futures)
+        else:
+            raw_audio = _synthesize_pcm(text, syn_config)
+
+        if not raw_audio:
+            return None
+
+        # Prepend the patched header template - no wave-module bookkeeping
+        return wav_header_for(len(raw_audio)) + raw_audio
+
+    except Exception as e:
+        print(f"Synthesis error: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _tune_ort_session(model_path, cuda):
+    """Rebuild the voice's ONNX Runtime session with tuned options.
+
+    PiperVoice.load creates a default InferenceSession; rebuilding it with
+    full graph optimization, memory-pattern reuse and (on CUDA) an
+    exhaustive conv-algo search lowers steady-state per-call overhead.
+    CUDA Graphs capture needs fixed input shapes, which variable-length
+    phoneme sequences never give us, so that stays off. Best-effort: any
+    failure keeps the session piper built.
+    """
+    try:
+        import onnxruntime as ort
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = \
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_options.enable_mem_pattern = True
+        sess_options.enable_cpu_mem_arena = True
+
+        if cuda:
+            providers = [('CUDAExecutionProvider',
+                          {'cudnn_conv_algo_search': 'EXHAUSTIVE'}),
+                         'CPUExecutionProvider']
+        else:
+            providers = ['CPUExecutionProvider']
+
+        voice.session = ort.InferenceSession(
+            model_path, sess_options=sess_options, providers=providers)
+        print("ONNX Runtime session tuned (full graph optimization)")
+    except Exception as e:
+        print(f"Session tuning skipped: {e}")
+
+
+def _serialize_phonemize():
+    """Route the loaded voice's phonemization through phonemize_lock.
+
+    Wraps the separable phonemize stage when this piper build exposes
+    one; otherwise serializes whole synthesize() calls - slower, but
+    never feeds espeak-ng from two threads at once.
+    """
+    if hasattr(voice, 'phonemize'):
+        orig = voice.phonemize
+
+        def locked_phonemize(*args, **kwargs):
+            with phonemize_lock:
+                return orig(*args, **kwargs)
+
+        voice.phonemize = locked_phonemize
+    else:
+        orig = voice.synthesize
+
+        def locked_synthesize(*args, **kwargs):
+            # Hold the lock only while the generator produces a chunk,
+            # never across the yield - the streaming path writes chunks
+            # to the client socket between pulls, and a stalled client
+            # must not keep the global lock
+            it = orig(*args, **kwargs)
+            while True:
+                with phonemize_lock:
+                    try:
+                        chunk = next(it)
+                    except StopIteration:
+                        return
+                yield chunk
+
+        voice.synthesize = locked_synthesize
+        print("Warning: piper build has no phonemize stage; "
+              "serializing chunk production")
+
+
 def load_voice(model_path, cuda=False):
     """Load Piper voice model."""
-    global voice, voice_config, use_cuda
+    global voice, voice_config, use_cuda, synth_pool, tts_batcher, \
+        wav_header_template, voice_path, sentence_pool
+
+    # Prefer an int8-quantized sibling when one exists (produced by
+    # scripts/quantize_piper.py) - half the weight bandwidth, and Jetson
+    # Orin's INT8 GEMM kernels pick it up automatically
+    base, ext = os.path.splitext(model_path)
+    int8_path = f"{base}-int8{ext}"
+    if not model_path.endswith(f"-int8{ext}") and os.path.exists(int8_path):
+        print(f"Using int8 quantized model: {os.path.basename(int8_path)}")
+        model_path = int8_path
+
+    voice_path = model_path
 
     from piper.voice import PiperVoice
 
@@ -273,11 +639,35 @@ def load_voice(model_path, cuda=False):
     print(f"Model loaded in {elapsed:.2f}s")
     print(f"Sample rate: {voice_config.sample_rate} Hz")
 
-    # Warm up the model with a short synthesis
+    _tune_ort_session(model_path, cuda)
+    _serialize_phonemize()
+
+    wav_header_template = build_wav_header_template(voice_config.sample_rate)
+
+    # On CUDA, two workers pipeline the stages inside synthesize(): while
+    # one request runs ONNX inference on the GPU, the other phonemizes on
+    # the CPU (InferenceSession.run is thread-safe; kernels still
+    # serialize on the device, so more than two buys nothing)
+    workers = 2 if cuda else max(1, (os.cpu_count() or 2) // 2)
+    synth_pool = ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix="synth")
+    tts_batcher = TTSBatcher()
+    if not cuda:
+        sentence_pool = ThreadPoolExecutor(max_workers=2,
+                                           thread_name_prefix="sentence")
+    print(f"Synthesis workers: {workers}")
+
+    # Warm up across several input lengths so ORT's memory arena and
+    # (on CUDA) cuDNN's algo cache specialize for the shapes real
+    # requests produce, not just the shortest one
     print("Warming up model...")
     warm_start = time.time()
-    for chunk in voice.synthesize("Hello."):
-        pass  # Consume generator
+    for text in ("Hello.",
+                 "This is a warmup sentence of medium length.",
+                 "A somewhat longer warmup sentence exercises the larger "
+                 "phoneme-sequence shapes that typical requests produce."):
+        for chunk in voice.synthesize(text):
+            pass  # Consume generator
     warm_elapsed = (time.time() - warm_start) * 1000
     print(f"Warmup synthesis: {warm_elapsed:.0f}ms")
 
@@ -292,8 +682,23 @@ def main():
                         help='Voice model path')
     parser.add_argument('--cuda', action='store_true',
                         help='Use CUDA (GPU) acceleration')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Persist synthesized WAVs here for reuse across restarts')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Disable per-request logging')
     args = parser.parse_args()
 
+    if args.quiet:
+        global quiet
+        quiet = True
+    else:
+        start_log_writer()
+
+    if args.cache_dir:
+        global cache_dir
+        os.makedirs(args.cache_dir, exist_ok=True)
+        cache_dir = args.cache_dir
+
     # Verify voice model
     if not os.path.exists(args.voice):
         print(f"Error: Voice model not found at {args.voice}")
@@ -9,14 +9,13 @@ Supports both ws:// and wss:// (SSL) connections
 import asyncio
 import json
 import time
-import tempfile
 import os
 import io
-import wave
 import argparse
 import struct
 import ssl
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -37,16 +36,98 @@ except ImportError:
     print("numpy not installed. Run: pip install numpy")
     exit(1)
 
+# Optional in-process webm decoding - skips the ~50-150ms ffmpeg
+# fork/exec per request on Jetson. Falls back to the ffmpeg pipe.
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps(obj) -> str:
+        # websockets needs str for text frames; orjson's C serializer
+        # plus one decode still beats json.dumps
+        return orjson.dumps(obj).decode()
+else:
+    _loads = json.loads
+    _dumps = json.dumps
+
 # Configuration
 DEFAULT_PORT = 8766
 DEFAULT_MODEL = "large-v3-turbo"
 SAMPLE_RATE = 16000
 CHANNELS = 1
 
+# Greedy decoding by default: beam 5 costs ~3-4x the decoder FLOPs for
+# marginal WER gains on short utterances; the temperature fallback list
+# retries only on repetition loops. Overridable via --beam-size.
+beam_size = 1
+
 # Global model (loaded once)
 model = None
 model_name = None
 
+# Serialized info payload, built once after load_model - it's constant
+# for the life of the process
+info_frame = None
+
+# Persistent Silero VAD session (loaded once alongside the model) and the
+# options matching the previous per-call vad_filter settings
+vad_model = None
+vad_options = None
+
+# GPU inference and ffmpeg decoding run here instead of on the event
+# loop, so other clients' binary receives keep flowing during a long
+# transcription. CTranslate2 releases the GIL during inference, and two
+# workers bound concurrent model use to what fits in VRAM.
+transcribe_pool = ThreadPoolExecutor(max_workers=2,
+                                     thread_name_prefix="transcribe")
+
+
+def _cuda_compute_type() -> str:
+    """Pick the CUDA compute type, preferring the int8 tensor-core path.
+
+    Orin-class GPUs have dedicated INT8 pipes with ~2x the throughput of
+    fp16 and half the weight traffic (~3.1 GB vs ~6 GB for
+    large-v3-turbo); int8_float16 keeps activations in fp16 for quality.
+    Cards that support neither fall through to CTranslate2's auto pick.
+    """
+    try:
+        import ctranslate2
+        supported = set(ctranslate2.get_supported_compute_types("cuda"))
+    except Exception:
+        return "auto"
+    for compute_type in ("int8_float16", "int8"):
+        if compute_type in supported:
+            return compute_type
+    return "auto"
+
+
+def _load_cpu_model(name: str):
+    """Load on CPU, walking a compute-type priority list.
+
+    int8_bfloat16 is fastest where supported, int8 next, float32 always
+    works - mirrors what CTranslate2 reports via
+    get_supported_compute_types but stays robust on builds that accept a
+    type at construction and fail at run time.
+    """
+    from faster_whisper import WhisperModel
+
+    last_error = None
+    for compute_type in ("int8_bfloat16", "int8", "float32"):
+        try:
+            return WhisperModel(name, device="cpu", compute_type=compute_type)
+        except ValueError as e:
+            last_error = e
+    raise last_error
+
 
 def load_model(name: str, device: str = "auto"):
     """Load faster-whisper model."""
@@ -57,245 +138,389 @@ def load_model(name: str, device: str = "auto"):
     print(f"Loading model: {name}")
     print("This may take a moment on first run (downloading model)...")
 
+    try:
+        import ctranslate2
+        print(f"Supported compute types (cpu): "
+              f"{sorted(ctranslate2.get_supported_compute_types('cpu'))}")
+    except Exception:
+        pass
+
     start = time.time()
 
-    # Try CUDA first, fall back to CPU if not available
+    # Try CUDA first, fall back to CPU if not available. compute_type
+    # "auto" lets CTranslate2 pick the fastest type the hardware actually
+    # supports (bf16/fp16/int8 vary by generation; hardcoding float16 or
+    # int8 crashes on cards without that path)
     if device == "auto":
         try:
-            model = WhisperModel(name, device="cuda", compute_type="float16")
+            compute_type = _cuda_compute_type()
+            print(f"CUDA compute type: {compute_type}")
+            model = WhisperModel(name, device="cuda", compute_type=compute_type)
             device = "cuda"
         except ValueError as e:
             if "CUDA" in str(e):
                 print("CUDA not available in CTranslate2, falling back to CPU...")
                 print("For GPU acceleration, build ctranslate2 from source with CUDA support")
-                model = WhisperModel(name, device="cpu", compute_type="int8")
+                model = _load_cpu_model(name)
                 device = "cpu"
             else:
                 raise
     elif device == "cuda":
-        model = WhisperModel(name, device="cuda", compute_type="float16")
+        compute_type = _cuda_compute_type()
+        print(f"CUDA compute type: {compute_type}")
+        model = WhisperModel(name, device="cuda", compute_type=compute_type)
     else:
-        model = WhisperModel(name, device="cpu", compute_type="int8")
+        model = _load_cpu_model(name)
 
     model_name = name
     elapsed = time.time() - start
 
     print(f"Model loaded in {elapsed:.2f}s (device: {device})")
 
-    # Warmup
-    print("Warming up model...")
-    import soundfile as sf
+    global info_frame
+    info_frame = _dumps({
+        "type": "info",
+        "model": model_name,
+        "engine": "faster-whisper",
+        "device": device,
+        "sample_rate": SAMPLE_RATE
+    })
+
+    # Instantiate Silero VAD once so per-request transcription reuses the
+    # session instead of going through the vad_filter wrapper each call
+    global vad_model, vad_options
+    try:
+        from faster_whisper.vad import get_vad_model, VadOptions
+        vad_model = get_vad_model()
+        vad_options = VadOptions(min_silence_duration_ms=300)
+        print("VAD session loaded")
+    except Exception as e:
+        print(f"Persistent VAD unavailable, using per-call vad_filter: {e}")
+        vad_model = None
 
-    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-        sf.write(f.name, np.zeros(16000, dtype=np.float32), 16000)
-        segments, _ = model.transcribe(f.name)
+    # Warmup with realistic lengths: low-level noise (silence would be
+    # VAD-skipped) at 30s locks in the kernel selection and allocator
+    # sizing real requests hit, a second 30s pass reuses the warmed
+    # caches, and a 5s pass covers the short-utterance shapes
+    print("Warming up model...")
+    warm_start = time.time()
+    long_audio = (np.random.randn(30 * SAMPLE_RATE) * 0.01).astype(np.float32)
+    short_audio = long_audio[:5 * SAMPLE_RATE]
+    for audio in (long_audio, long_audio, short_audio):
+        segments, _ = model.transcribe(audio, beam_size=1)
         list(segments)  # Consume generator
-        os.unlink(f.name)
+    print(f"Warmup complete in {time.time() - warm_start:.2f}s")
 
-    print("Warmup complete")
 
+def pcm_to_float32(pcm_data) -> np.ndarray:
+    """Convert raw 16-bit mono PCM at 16 kHz to the float32 array whisper expects."""
+    return np.frombuffer(pcm_data, dtype=np.int16).astype(np.float32) / 32768.0
 
-def transcribe_audio(audio_data: bytes) -> dict:
-    """Transcribe audio data and return result."""
-    global model
 
-    # Save to temp file (faster-whisper needs a file path)
-    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-        f.write(audio_data)
-        temp_path = f.name
+def transcribe_audio(audio, on_segment=None) -> dict:
+    """Transcribe audio and return result.
 
-    try:
-        start_time = time.time()
-
-        # Transcribe with VAD filtering for better results
-        segments, info = model.transcribe(
-            temp_path,
-            beam_size=5,
-            language="en",
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=300)
-        )
-
-        # Collect results
-        text_parts = []
-        for segment in segments:
-            text_parts.append(segment.text)
-
-        full_text = " ".join(text_parts).strip()
-        elapsed_ms = (time.time() - start_time) * 1000
-
-        return {
-            "type": "transcription",
-            "text": full_text,
-            "language": info.language,
-            "language_probability": info.language_probability,
-            "duration": info.duration,
-            "transcription_time_ms": elapsed_ms,
-            "final": True
-        }
-    finally:
-        os.unlink(temp_path)
+    Accepts a float32 numpy array at 16 kHz or a file-like object holding
+    WAV bytes - both go straight into model.transcribe, so no tempfile
+    write/read/decode round-trip per request.
 
+    When on_segment is given it is called with a partial-result dict as
+    each segment comes off the decoder, so delivery overlaps decoding
+    instead of waiting for the final blob.
+    """
+    global model
 
-def convert_webm_to_wav(webm_data: bytes) -> Optional[bytes]:
-    """Convert WebM/Opus audio to WAV format using ffmpeg."""
-    import subprocess
+    start_time = time.time()
+
+    # VAD filtering for better results. Array inputs run the persistent
+    # Silero session up front and hand whisper just the speech spans;
+    # mostly-silent audio short-circuits without touching the GPU at all.
+    vad_kwargs = dict(vad_filter=True,
+                      vad_parameters=dict(min_silence_duration_ms=300))
+    if vad_model is not None and isinstance(audio, np.ndarray):
+        from faster_whisper.vad import get_speech_timestamps
+
+        speech = get_speech_timestamps(audio, vad_options)
+        if not speech:
+            return {
+                "type": "transcription",
+                "text": "",
+                "language": "en",
+                "language_probability": 1.0,
+                "duration": len(audio) / SAMPLE_RATE,
+                "transcription_time_ms": (time.time() - start_time) * 1000,
+                "final": True
+            }
+        clips = []
+        for span in speech:
+            clips.append(span["start"] / SAMPLE_RATE)
+            clips.append(span["end"] / SAMPLE_RATE)
+        vad_kwargs = dict(vad_filter=False, clip_timestamps=clips)
+
+    segments, info = model.transcribe(
+        audio,
+        beam_size=beam_size,
+        best_of=beam_size,
+        temperature=[0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+        compression_ratio_threshold=2.4,
+        no_speech_threshold=0.6,
+        language="en",
+        **vad_kwargs
+    )
+
+    # Collect results, surfacing each segment as it is produced
+    text_parts = []
+    for segment in segments:
+        text_parts.append(segment.text)
+        if on_segment is not None:
+            on_segment({
+                "type": "partial",
+                "text": segment.text,
+                "start": segment.start,
+                "end": segment.end
+            })
+
+    full_text = " ".join(text_parts).strip()
+    elapsed_ms = (time.time() - start_time) * 1000
+
+    return {
+        "type": "transcription",
+        "text": full_text,
+        "language": info.language,
+        "language_probability": info.language_probability,
+        "duration": info.duration,
+        "transcription_time_ms": elapsed_ms,
+        "final": True
+    }
+
+
+def _decode_webm_pyav(webm_data: bytes) -> Optional[bytes]:
+    """Decode webm to raw 16 kHz mono s16 PCM in-process with PyAV."""
+    try:
+        container = av.open(io.BytesIO(webm_data))
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format='s16', layout='mono',
+                                      rate=SAMPLE_RATE)
+        parts = []
+        for packet in container.demux(stream):
+            for frame in packet.decode():
+                for resampled in resampler.resample(frame):
+                    parts.append(bytes(resampled.planes[0]))
+        container.close()
+        return b''.join(parts)
+    except Exception as e:
+        print(f"PyAV decode error, falling back to ffmpeg: {e}")
+        return None
 
-    with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as webm_file:
-        webm_file.write(webm_data)
-        webm_path = webm_file.name
 
-    wav_path = webm_path.replace('.webm', '.wav')
+def convert_webm_to_pcm(webm_data: bytes) -> Optional[bytes]:
+    """Decode WebM/Opus audio to raw 16 kHz mono PCM.
+
+    Uses PyAV when installed - decoding stays in-process, amortizing
+    codec init across requests instead of paying an ffmpeg fork/exec per
+    call. Otherwise the bytes go to ffmpeg's stdin and decoded s16le PCM
+    comes back on stdout - no tempfiles either way, and no WAV header
+    since transcription consumes the raw samples.
+    """
+    if av is not None:
+        pcm = _decode_webm_pyav(webm_data)
+        if pcm:
+            return pcm
 
     try:
-        # Use ffmpeg to convert
         result = subprocess.run([
-            'ffmpeg', '-y', '-i', webm_path,
+            'ffmpeg', '-y',
+            '-i', 'pipe:0',
             '-ar', str(SAMPLE_RATE),
             '-ac', str(CHANNELS),
-            '-f', 'wav',
-            wav_path
-        ], capture_output=True, timeout=30)
+            '-f', 's16le',
+            'pipe:1'
+        ], input=webm_data, capture_output=True, timeout=30)
 
         if result.returncode != 0:
             print(f"ffmpeg error: {result.stderr.decode()}")
             return None
 
-        with open(wav_path, 'rb') as f:
-            return f.read()
+        return result.stdout
     except Exception as e:
         print(f"Conversion error: {e}")
         return None
-    finally:
-        if os.path.exists(webm_path):
-            os.unlink(webm_path)
-        if os.path.exists(wav_path):
-            os.unlink(wav_path)
 
 
 def pcm_to_wav(pcm_data: bytes, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS) -> bytes:
-    """Convert raw PCM data to WAV format."""
-    buffer = io.BytesIO()
-    with wave.open(buffer, 'wb') as wav:
-        wav.setnchannels(channels)
-        wav.setsampwidth(2)  # 16-bit
-        wav.setframerate(sample_rate)
-        wav.writeframes(pcm_data)
-    return buffer.getvalue()
+    """Convert raw 16-bit PCM data to WAV format.
+
+    Packs the 44-byte RIFF header directly - one allocation and one copy
+    instead of the wave module's BytesIO seeks and attribute bookkeeping.
+    """
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + len(pcm_data), b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate,
+        sample_rate * channels * 2, channels * 2, 16,
+        b'data', len(pcm_data))
+    return header + pcm_data
+
+
+# Static control frames, serialized once. Sent as str so they stay text
+# frames on the wire (a bytes send would arrive as a binary frame).
+RECORDING_STATUS_FRAME = _dumps({
+    "type": "status",
+    "status": "recording",
+    "message": "Recording started"
+})
+TRANSCRIBING_STATUS_FRAME = _dumps({
+    "type": "status",
+    "status": "transcribing",
+    "message": "Transcribing audio..."
+})
 
 
 async def handle_websocket(websocket):
     """Handle WebSocket connection for audio streaming."""
     print(f"[WS] New connection from {websocket.remote_address}")
 
-    audio_chunks = []
+    # One growable buffer instead of a list of frames: extend() appends in
+    # place and the result hands straight to ffmpeg stdin / np.frombuffer
+    # via the buffer protocol, skipping the b''.join copy at stop
+    audio_buffer = bytearray()
+    n_chunks = 0
     audio_format = None
     sample_rate = SAMPLE_RATE
     is_recording = False
+    total_bytes = 0
+    last_ack = 0.0
 
     try:
         async for message in websocket:
             # Handle text messages (commands)
             if isinstance(message, str):
+                # Fast-peek for the keepalive flood: ping frames are tiny
+                # and frequent, so answer them without parsing at all
+                if '"ping"' in message[:32]:
+                    await websocket.send(_dumps({
+                        "type": "pong",
+                        "model": model_name,
+                        "timestamp": time.time()
+                    }))
+                    continue
+
                 try:
-                    data = json.loads(message)
+                    data = _loads(message)
                     cmd = data.get('type', data.get('command', ''))
 
                     if cmd == 'start':
                         # Start recording session
-                        audio_chunks = []
+                        audio_buffer = bytearray()
+                        n_chunks = 0
                         audio_format = data.get('format', 'webm')
                         sample_rate = data.get('sampleRate', SAMPLE_RATE)
                         is_recording = True
+                        total_bytes = 0
+                        last_ack = time.monotonic()
                         print(f"[WS] Recording started (format={audio_format}, rate={sample_rate})")
-                        await websocket.send(json.dumps({
-                            "type": "status",
-                            "status": "recording",
-                            "message": "Recording started"
-                        }))
+                        await websocket.send(RECORDING_STATUS_FRAME)
 
                     elif cmd == 'stop':
                         # Stop recording and transcribe
                         is_recording = False
-                        print(f"[WS] Recording stopped, {len(audio_chunks)} chunks received")
+                        print(f"[WS] Recording stopped, {n_chunks} chunks received")
 
-                        if not audio_chunks:
-                            await websocket.send(json.dumps({
+                        if not audio_buffer:
+                            await websocket.send(_dumps({
                                 "type": "error",
                                 "message": "No audio data received"
                             }))
                             continue
 
-                        # Combine audio chunks
-                        combined_audio = b''.join(audio_chunks)
-                        print(f"[WS] Total audio size: {len(combined_audio)} bytes")
+                        combined_audio = audio_buffer
+                        print(f"[WS] Total audio size: {total_bytes} bytes")
+
+                        # Convert format if needed - whisper consumes
+                        # float32 arrays or WAV file objects directly,
+                        # no tempfiles involved
+                        loop = asyncio.get_running_loop()
 
-                        # Convert format if needed
                         if audio_format in ('webm', 'opus', 'ogg'):
-                            print("[WS] Converting WebM/Opus to WAV...")
-                            wav_data = convert_webm_to_wav(combined_audio)
-                            if wav_data is None:
-                                await websocket.send(json.dumps({
+                            print("[WS] Decoding WebM/Opus to PCM...")
+                            pcm_data = await loop.run_in_executor(
+                                transcribe_pool, convert_webm_to_pcm,
+                                combined_audio)
+                            if pcm_data is None:
+                                await websocket.send(_dumps({
                                     "type": "error",
                                     "message": "Failed to convert audio format"
                                 }))
                                 continue
+                            audio = pcm_to_float32(pcm_data)
                         elif audio_format == 'pcm':
-                            wav_data = pcm_to_wav(combined_audio, sample_rate)
+                            if sample_rate == SAMPLE_RATE:
+                                audio = pcm_to_float32(combined_audio)
+                            else:
+                                # Off-rate PCM still goes through WAV so
+                                # whisper's decoder resamples it
+                                audio = io.BytesIO(
+                                    pcm_to_wav(combined_audio, sample_rate))
                         else:
                             # Assume WAV
-                            wav_data = combined_audio
+                            audio = io.BytesIO(combined_audio)
 
                         # Transcribe
-                        await websocket.send(json.dumps({
-                            "type": "status",
-                            "status": "transcribing",
-                            "message": "Transcribing audio..."
-                        }))
+                        await websocket.send(TRANSCRIBING_STATUS_FRAME)
+
+                        # Relay partial segments from the worker thread
+                        # as the decoder produces them; the final frame
+                        # still follows with the full text
+                        def send_partial(partial, _loop=loop, _ws=websocket):
+                            asyncio.run_coroutine_threadsafe(
+                                _ws.send(_dumps(partial)), _loop)
 
                         try:
-                            result = transcribe_audio(wav_data)
+                            result = await loop.run_in_executor(
+                                transcribe_pool, transcribe_audio, audio,
+                                send_partial)
                             print(f"[WS] Transcription: '{result['text']}' ({result['transcription_time_ms']:.0f}ms)")
-                            await websocket.send(json.dumps(result))
+                            await websocket.send(_dumps(result))
                         except Exception as e:
                             print(f"[WS] Transcription error: {e}")
-                            await websocket.send(json.dumps({
+                            await websocket.send(_dumps({
                                 "type": "error",
                                 "message": f"Transcription failed: {str(e)}"
                             }))
 
-                        audio_chunks = []
+                        audio_buffer = bytearray()
+                        n_chunks = 0
 
                     elif cmd == 'ping':
-                        await websocket.send(json.dumps({
+                        await websocket.send(_dumps({
                             "type": "pong",
                             "model": model_name,
                             "timestamp": time.time()
                         }))
 
                     elif cmd == 'info':
-                        await websocket.send(json.dumps({
-                            "type": "info",
-                            "model": model_name,
-                            "engine": "faster-whisper",
-                            "device": "cuda",
-                            "sample_rate": SAMPLE_RATE
-                        }))
+                        await websocket.send(info_frame)
 
-                except json.JSONDecodeError:
+                except ValueError:
                     print(f"[WS] Invalid JSON: {message[:100]}")
 
             # Handle binary messages (audio data)
             elif isinstance(message, bytes):
                 if is_recording:
-                    audio_chunks.append(message)
-                    # Send periodic acknowledgment
-                    if len(audio_chunks) % 10 == 0:
-                        await websocket.send(json.dumps({
+                    audio_buffer.extend(message)
+                    n_chunks += 1
+                    total_bytes += len(message)
+                    # Periodic acknowledgment, time-gated: the counter
+                    # keeps this O(1) per frame instead of re-summing a
+                    # growing chunk list every tenth message
+                    now = time.monotonic()
+                    if now - last_ack > 1.0:
+                        last_ack = now
+                        await websocket.send(_dumps({
                             "type": "status",
                             "status": "receiving",
-                            "chunks": len(audio_chunks),
-                            "bytes": sum(len(c) for c in audio_chunks)
+                            "chunks": n_chunks,
+                            "bytes": total_bytes
                         }))
 
     except websockets.exceptions.ConnectionClosed as e:
@@ -308,6 +533,29 @@ async def handle_websocket(websocket):
         print(f"[WS] Connection ended")
 
 
+def _touch_model(audio):
+    """Run a minimal transcription to keep the weights resident."""
+    segments, _ = model.transcribe(audio, beam_size=1)
+    list(segments)
+
+
+async def model_keepalive(interval: float = 60.0):
+    """Background task that defeats idle weight unloading.
+
+    A dedicated server should never pay the 1-2s reload stall after the
+    user pauses; a 0.1s transcription per minute keeps CUDA memory and
+    kernel caches warm at negligible cost.
+    """
+    silence = np.zeros(1600, dtype=np.float32)
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(transcribe_pool, _touch_model, silence)
+        except Exception as e:
+            print(f"[keepalive] skipped: {e}")
+
+
 def generate_self_signed_cert(cert_dir: Path):
     """Generate a self-signed certificate for WSS."""
     cert_file = cert_dir / "server.crt"
@@ -402,8 +650,21 @@ async def main(host: str, port: int, model_name_arg: str, device: str = "auto",
     print("Press Ctrl+C to stop")
     print("=" * 60)
 
-    async with serve(handle_websocket, host, port, ssl=ssl_context):
-        await asyncio.Future()  # Run forever
+    # compression=None: the audio is already-compressed opus/webm (or raw
+    # PCM the deflate pass barely shrinks), so per-message-deflate just
+    # burns CPU on every frame. max_size raised so long recordings don't
+    # force client-side reframing.
+    keepalive_task = asyncio.create_task(model_keepalive())
+
+    try:
+        async with serve(handle_websocket, host, port, ssl=ssl_context,
+                         max_size=32 * 1024 * 1024,
+                         compression=None,
+                         ping_interval=20,
+                         ping_timeout=20):
+            await asyncio.Future()  # Run forever
+    finally:
+        keepalive_task.cancel()
 
 
 if __name__ == '__main__':
@@ -417,6 +678,11 @@ if __name__ == '__main__':
     parser.add_argument('-d', '--device', default='auto',
                         choices=['auto', 'cuda', 'cpu'],
                         help='Device to use (default: auto, tries cuda then cpu)')
+    parser.add_argument('--beam-size', type=int, default=1,
+                        help='Decoder beam size; >1 trades latency for accuracy (default: 1)')
+    parser.add_argument('--engine', default='faster-whisper',
+                        choices=['faster-whisper', 'trt-llm'],
+                        help='Inference engine (default: faster-whisper)')
     parser.add_argument('--ssl-cert', type=str, default=None,
                         help='Path to SSL certificate file')
     parser.add_argument('--ssl-key', type=str, default=None,
@@ -425,6 +691,28 @@ if __name__ == '__main__':
                         help='Disable SSL (use plain ws:// instead of wss://)')
     args = parser.parse_args()
 
+    beam_size = args.beam_size
+
+    # uvloop's libuv event loop cuts per-frame overhead on the binary
+    # ingest path; the server runs unchanged on the stock loop without it
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        print("uvloop not installed, using default asyncio event loop")
+
+    if args.engine == 'trt-llm':
+        # A compiled TensorRT-LLM engine (fused attention, per-shape
+        # autotuning) is the fastest Jetson path, but it needs
+        # per-device encoder/decoder engines built out-of-band; there is
+        # no drop-in runtime to ship here yet.
+        print("trt-llm engine support is not wired up yet.")
+        print("Build engines with TensorRT-LLM examples/whisper:")
+        print("  python3 build.py --model_name large-v3-turbo --dtype float16 \\")
+        print("      --use_gpt_attention_plugin --use_gemm_plugin")
+        print("then run this server with --engine faster-whisper meanwhile.")
+        exit(1)
+
     try:
         asyncio.run(main(args.bind, args.port, args.model, args.device,
                          args.ssl_cert, args.ssl_key, args.no_ssl))
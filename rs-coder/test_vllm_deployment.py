@@ -5,13 +5,14 @@ Tests the deployed vLLM server with various prompts and measures performance
 """
 
 import argparse
+import asyncio
 import time
 import json
 import sys
 from typing import List, Dict
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
 except ImportError:
     print("❌ OpenAI package not installed")
     print("Install with: pip install openai")
@@ -51,15 +52,27 @@ def print_info(text: str):
     print(f"{Colors.YELLOW}[i]{Colors.END} {text}")
 
 
+# Shared keep-alive session for plain HTTP probes - repeated health
+# polls reuse one TCP connection instead of handshaking each time
+_session = None
+
+
+def _http_session():
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
 def test_health(base_url: str) -> bool:
     """Test server health endpoint"""
-    import requests
 
     print_info("Testing server health...")
     health_url = base_url.replace('/v1', '/health')
 
     try:
-        response = requests.get(health_url, timeout=5)
+        response = _http_session().get(health_url, timeout=5)
         if response.status_code == 200:
             print_status("Server is healthy")
             return True
@@ -71,34 +84,60 @@ def test_health(base_url: str) -> bool:
         return False
 
 
-def test_completion(client: OpenAI, model: str, prompt: str, max_tokens: int = 256) -> Dict:
-    """Test a single completion"""
+async def test_completion(client: AsyncOpenAI, model: str, prompt: str, max_tokens: int = 256) -> Dict:
+    """Test a single completion with streaming serving metrics"""
 
     start_time = time.time()
 
     try:
-        response = client.chat.completions.create(
+        # Stream so time-to-first-token and time-per-output-token can be
+        # measured separately - the standard serving metrics
+        stream = await client.chat.completions.create(
             model=model,
             messages=[
                 {"role": "user", "content": prompt}
             ],
             max_tokens=max_tokens,
             temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True},
         )
 
+        first_token_time = None
+        usage = None
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token_time is None:
+                    first_token_time = time.time()
+                parts.append(chunk.choices[0].delta.content)
+            if chunk.usage is not None:
+                usage = chunk.usage
+
         end_time = time.time()
         duration = end_time - start_time
 
-        completion = response.choices[0].message.content
-        tokens_generated = len(completion.split())  # Rough estimate
+        completion = ''.join(parts)
+        # Exact count from the server's usage accounting, not a word-split
+        # estimate (tokens != words, especially for code)
+        if usage is not None:
+            tokens_generated = usage.completion_tokens
+        else:
+            tokens_generated = len(completion.split())  # Rough fallback
         tokens_per_second = tokens_generated / duration if duration > 0 else 0
 
+        ttft = (first_token_time - start_time) if first_token_time else duration
+        decode_time = end_time - first_token_time if first_token_time else 0
+        tpot = decode_time / (tokens_generated - 1) if tokens_generated > 1 else 0
+
         return {
             "success": True,
             "completion": completion,
             "duration": duration,
             "tokens": tokens_generated,
             "tokens_per_second": tokens_per_second,
+            "ttft": ttft,
+            "tpot": tpot,
         }
 
     except Exception as e:
@@ -108,14 +147,14 @@ def test_completion(client: OpenAI, model: str, prompt: str, max_tokens: int = 2
         }
 
 
-def run_tests(base_url: str, model: str):
-    """Run a suite of tests"""
+async def run_tests(base_url: str, model: str):
+    """Run a suite of tests concurrently"""
 
     print_header("vLLM Deployment Test Suite")
 
     # Initialize client
     print_info(f"Connecting to: {base_url}")
-    client = OpenAI(
+    client = AsyncOpenAI(
         base_url=base_url,
         api_key="token"  # vLLM doesn't require a real key
     )
@@ -154,26 +193,30 @@ def run_tests(base_url: str, model: str):
         }
     ]
 
-    # Run tests
-    results = []
+    # Fire all prompts concurrently - vLLM batches them into shared
+    # decode steps, so this measures the continuous-batching path the
+    # server actually runs in production, not serial latency
+    print_header("Running Test Cases (concurrent)")
 
-    print_header("Running Test Cases")
+    suite_start = time.time()
+    completions = await asyncio.gather(*[
+        test_completion(client, model, tc['prompt'], tc['max_tokens'])
+        for tc in test_cases
+    ])
+    suite_elapsed = time.time() - suite_start
+    print_info(f"All {len(test_cases)} requests finished in {suite_elapsed:.2f}s")
+
+    results = []
 
-    for i, test_case in enumerate(test_cases, 1):
+    for i, (test_case, result) in enumerate(zip(test_cases, completions), 1):
         print(f"\n{Colors.BOLD}Test {i}/{len(test_cases)}: {test_case['name']}{Colors.END}")
         print(f"Prompt: {test_case['prompt'][:80]}...")
 
-        result = test_completion(
-            client,
-            model,
-            test_case['prompt'],
-            test_case['max_tokens']
-        )
-
         if result['success']:
             print_status(f"Completed in {result['duration']:.2f}s")
-            print(f"  Tokens: ~{result['tokens']}")
-            print(f"  Speed: ~{result['tokens_per_second']:.1f} tokens/sec")
+            print(f"  Tokens: {result['tokens']}")
+            print(f"  Speed: {result['tokens_per_second']:.1f} tokens/sec")
+            print(f"  TTFT: {result['ttft'] * 1000:.0f}ms | TPOT: {result['tpot'] * 1000:.1f}ms")
             print(f"\n  Response:\n  {'-' * 76}")
             # Print first 200 chars of response
             response_preview = result['completion'][:200]
@@ -190,9 +233,6 @@ def run_tests(base_url: str, model: str):
             **result
         })
 
-        # Small delay between tests
-        time.sleep(1)
-
     # Print summary
     print_header("Test Summary")
 
@@ -205,11 +245,13 @@ def run_tests(base_url: str, model: str):
         avg_duration = sum(r['duration'] for r in results if r['success']) / successful
         avg_tokens = sum(r['tokens'] for r in results if r['success']) / successful
         avg_speed = sum(r['tokens_per_second'] for r in results if r['success']) / successful
+        avg_ttft = sum(r['ttft'] for r in results if r['success']) / successful
 
         print(f"\nAverage performance:")
         print(f"  Duration: {avg_duration:.2f}s")
-        print(f"  Tokens: ~{avg_tokens:.0f}")
-        print(f"  Speed: ~{avg_speed:.1f} tokens/sec")
+        print(f"  Tokens: {avg_tokens:.0f}")
+        print(f"  Speed: {avg_speed:.1f} tokens/sec")
+        print(f"  TTFT: {avg_ttft * 1000:.0f}ms")
 
     # Save detailed results
     output_file = f"test_results_{int(time.time())}.json"
@@ -326,7 +368,7 @@ Examples:
     if args.interactive:
         interactive_mode(base_url, args.model)
     else:
-        run_tests(base_url, args.model)
+        asyncio.run(run_tests(base_url, args.model))
 
 
 if __name__ == "__main__":
@@ -1,9 +1,17 @@
 """Quick test script to query GPT-5 model."""
 
 import os
+from functools import lru_cache
+
 from openai import OpenAI
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
+@lru_cache(maxsize=1)
+def get_client():
+    """One shared client per interpreter - reuses the underlying httpx
+    connection pool across calls instead of handshaking each time."""
+    return OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
 
 # Hard AIME-style math problem to test GPT-5's capabilities
 # GPT-5 scores 94.6% on AIME 2025 without tools
@@ -14,15 +22,36 @@ Find the sum of all elements in S.
 Show your step-by-step reasoning.
 """
 
-response = client.chat.completions.create(
-    model="gpt-5",
-    messages=[
-        {"role": "user", "content": math_problem}
-    ]
-)
-
-print("Model:", response.model)
-print("\nResponse:")
-print(response.choices[0].message.content)
-print("\n" + "="*50)
-print("Usage:", response.usage)
+
+def main():
+    client = get_client()
+
+    # Stream so tokens print as they arrive (first output after ~1 RTT)
+    # and the full answer is never buffered in memory
+    stream = client.chat.completions.create(
+        model="gpt-5",
+        messages=[
+            {"role": "user", "content": math_problem}
+        ],
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+
+    model = None
+    usage = None
+    print("Response:")
+    for chunk in stream:
+        if model is None:
+            model = chunk.model
+        if chunk.choices and chunk.choices[0].delta.content:
+            print(chunk.choices[0].delta.content, end="", flush=True)
+        if chunk.usage is not None:
+            usage = chunk.usage
+
+    print("\n\n" + "=" * 50)
+    print("Model:", model)
+    print("Usage:", usage)
+
+
+if __name__ == "__main__":
+    main()